@@ -1,51 +1,36 @@
-import fitz  # PyMuPDF
+import argparse
+import heapq
+import multiprocessing
 import os
-import json
 import re
 from collections import defaultdict
+from functools import partial
+from operator import itemgetter
 
-def extract_outline(pdf_path):
-    doc = fitz.open(pdf_path)
-    text_blocks = []
-
-    # Step 1: Extract all text blocks
-    for page_num, page in enumerate(doc, start=1):
-        for block in page.get_text("dict")["blocks"]:
-            if "lines" in block:
-                for line in block["lines"]:
-                    line_text = ""
-                    line_size = 0
-                    line_flags = 0
-                    span_count = 0
-
-                    for span in line["spans"]:
-                        line_text += span["text"]
-                        line_size += span["size"]
-                        line_flags |= span["flags"]
-                        span_count += 1
-
-                    if line_text.strip() and span_count > 0:
-                        text_blocks.append({
-                            "text": line_text.strip(),
-                            "size": round(line_size / span_count, 1),
-                            "page": page_num,
-                            "flags": line_flags,
-                            "bbox": line["bbox"]
-                        })
-
-    doc.close()
-
-    # Step 2: Merge multi-line headings
-    def can_merge_blocks(a, b):
-        same_page = a["page"] == b["page"]
-        size_match = abs(a["size"] - b["size"]) < 0.5
-        left_aligned = abs(a["bbox"][0] - b["bbox"][0]) < 5
-        vertical_gap = b["bbox"][1] - a["bbox"][3]
-        close_enough = 0 < vertical_gap < 12
-        combined_len = len((a["text"] + " " + b["text"]).strip())
-
-        return same_page and size_match and left_aligned and close_enough and combined_len < 150
+from bookmarks import BOOKMARK_MODES, covers_document, merge_bookmarks, read_bookmarks
+from heading_rules import PROFILES
+from heading_scoring import detect_headings
+from line_table import concat_tables, extract_line_table, line_text_blocks, page_count, page_ranges
+from pdf_batch import process_all_pdfs as _process_all_pdfs, resolve_workers
+from resource_limits import describe_resources, detect_resources
+from span_cache import (cached_line_table, cached_page_count, document_key, iter_line_pages, load_line_table,
+                        store_line_table)
+from worker_pool import open_pool
 
+
+def can_merge_blocks(a, b):
+    same_page = a["page"] == b["page"]
+    size_match = abs(a["size"] - b["size"]) < 0.5
+    left_aligned = abs(a["bbox"][0] - b["bbox"][0]) < 5
+    vertical_gap = b["bbox"][1] - a["bbox"][3]
+    close_enough = 0 < vertical_gap < 12
+    combined_len = len((a["text"] + " " + b["text"]).strip())
+
+    return same_page and size_match and left_aligned and close_enough and combined_len < 150
+
+
+def merge_lines(text_blocks):
+    # Step 2: Merge multi-line headings (never across pages, so this can run per page)
     merged = []
     i = 0
     while i < len(text_blocks) - 1:
@@ -64,205 +49,314 @@ def extract_outline(pdf_path):
             i += 1
     if i == len(text_blocks) - 1:
         merged.append(text_blocks[-1])
-    text_blocks = merged
+    return merged
+
 
-    # Step 3: Font size analysis
-    font_sizes = defaultdict(int)
+def add_font_sizes(font_sizes, text_blocks):
+    # Step 3: Font size histogram; can be fed page by page
     for block in text_blocks:
         font_sizes[block["size"]] += 1
-    avg_size = sum(size * count for size, count in font_sizes.items()) / sum(font_sizes.values())
-
-    # Step 4: Detect potential headings
-    def is_potential_heading(block):
-        text = block["text"]
-        size = block["size"]
-        flags = block["flags"]
-        score = 0
-
-        # Font size
-        if size > avg_size * 1.2:
-            score += 3
-        elif size > avg_size * 1.1:
-            score += 2
-        elif size > avg_size:
-            score += 1
-
-        
-
-        # Numbered formats
-        if re.match(r'^\d+(\.\d+)+\s+\w+', text):
-            score -= 5
-
-        elif re.match(r'^Chapter\s+\d+', text, re.IGNORECASE):
-            score += 4
-        elif re.match(r'^[IVXLCDM]+\.\s+', text):
-            score += 3
-
-        # Format heuristics
-        if text.isupper() and 3 <= len(text) <= 50:
-            score += 2
-        if len(text.split()) <= 8 and not text.endswith('.'):
-            score += 1
-        if len(text) <= 100:
-            score += 1
-
-        # Filter out common non-headings
-        lower = text.lower()
-        false_patterns = [
-            'figure', 'table', 'chart', 'image', 'appendix', 'references', 'index',
-            'www.', 'http', 'copyright', 'licensed to', '<null>', 'all rights reserved'
-        ]
-        if any(word in lower for word in false_patterns):
-            score -= 3
-        if re.match(r'^\d+(\.\d+)*\.?$', text):
-            score -= 5
-        if len(text) > 200:
-            score -= 3
-
-        # Extra citation/reference filters
-        citation_patterns = [
-        r'\(\d{4}\)',                                # (1995)
-        r'\d{4}[:\-]\s*\d+(-\d+)?',                  # 1995: 273 or 1995-273
-        r'\bvol\.?\s*\d+\b',                         # vol. 20
-        r'\bno\.?\s*\d+\b',                          # no. 3
-        r'\bpp?\.?\s*\d+(-\d+)?\b',                  # p. 23 or pp. 273-297
-        r'\b[A-Z]\.\s*[A-Z]\.',                      # A. M.
-        r'\b\d+\s*\(\d{4}\)',                        # 59 (1950)
-        r'“[^”]{5,}”',                               # “Quoted title”
-        r'"[^"]{5,}"',                               # "Quoted title"
-        r'\b[A-Z][a-z]+,\s*[A-Z]\.([A-Z]\.)?',       # Last, F. or Last, F.M.
-        r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b',       # Full name (e.g., Vladimir Vapnik, Alexey Chervonenkis)
-        r'\b[A-Z][a-z]+\s+[A-Z]\.',                  # First Last initials (e.g., Alexey C.)
-        r'\bIn\s+Proceedings\b.*?\d{4}',             # In Proceedings ... 2020
-        r'\(\d{4}\):\s*\d+(-\d+)?',                  # (1995): 273–297
-        r'\[\d+\]',                                  # [1], [23]
-        r'(?<!\d)\d{4}(?!\d)',                       # Standalone 4-digit year, avoids matching 12345
-    ]
-        citation_hits = 0
-        for pattern in citation_patterns:
-            if re.search(pattern, text):
-                citation_hits += 1
-        if citation_hits >= 2:
-            score -= 6
-        elif citation_hits == 1 and len(text) > 50:
-            score -= 4
-                # Reject lines that are just digits (e.g., "0 1", "2 3", etc.)
-        digit_words = sum(1 for w in text.split() if w.isdigit())
-        if digit_words >= 2 and digit_words == len(text.split()):
-            return False
-
-        return score >= 4
-
-    # Step 5: Collect and sort headings
-    headings = [block for block in text_blocks if is_potential_heading(block)]
-    headings.sort(key=lambda x: (x["page"], x["bbox"][1]))
-
-    # Step 6: Assign levels
-    def determine_level(heading, all_headings):
-        text = heading["text"]
-        if re.match(r'^\d+\.\d+\.\d+', text):
-            return "H3"
-        elif re.match(r'^\d+\.\d+', text):
-            return "H2"
-        elif re.match(r'^\d+\.', text):
-            return "H1"
-        elif re.match(r'^Chapter\s+\d+', text, re.IGNORECASE):
-            return "H1"
-        elif re.match(r'^[IVXLCDM]+\.', text):
-            return "H1"
-
-        sizes = sorted(set(h["size"] for h in all_headings), reverse=True)
-        if heading["size"] == sizes[0]:
-            return "H1"
-        elif heading["size"] == sizes[1]:
-            return "H2"
-        elif len(sizes) > 2 and heading["size"] == sizes[2]:
-            return "H3"
-        else:
-            return "H2"
-
-    # Step 7: Build outline
-        # Step 7–9: Group by title sections (like CHAPTER 1, PART I, etc.)
-    sections = []
-    current_section = {
-        "title": "Untitled Section",
-        "outline": []
-    }
-
-    def is_new_section(heading_text):
-        return bool(re.match(r'^(Chapter|CHAPTER|Part|PART|Section|SECTION)\s+\w+', heading_text))
-
+    return font_sizes
+
+
+def average_font_size(font_sizes):
+    return sum(size * count for size, count in font_sizes.items()) / sum(font_sizes.values())
+
+
+def iter_merged_pages(pdf_path, cache_dir=None, pages=None, key=None):
+    # (page number, merged lines) one page at a time
+    for page_num, table in iter_line_pages(pdf_path, cache_dir, pages, key):
+        yield page_num, merge_lines(line_text_blocks(table))
+
+
+def _extract_shard(pdf_path, first, last):
+    # Runs in a worker process: opens the PDF itself and returns the line
+    # table and merged lines of pages first..last
+    table = extract_line_table(pdf_path, pages=range(first, last + 1))
+    return table, merge_lines(line_text_blocks(table))
+
+
+def load_merged_lines(pdf_path, cache_dir=None, shard_pages=None, shard_workers=1):
+    # Steps 1–2 for the whole document. A document longer than shard_pages
+    # (and not in the span cache) is cut into page ranges that are extracted
+    # and merged in parallel. Merges never cross pages, so the ranges' merged
+    # lines, concatenated, are exactly those of the whole document; the
+    # partial tables are joined so the span cache still gets a full entry.
+    key = document_key(pdf_path, cache_dir)  # hashed once for every lookup below
+    table = cached_line_table(pdf_path, cache_dir, key)
+    if table is None and shard_pages:
+        ranges = page_ranges(page_count(pdf_path), shard_pages)
+        if len(ranges) > 1:
+            firsts, lasts = zip(*ranges)
+            paths = [pdf_path] * len(ranges)
+            if (shard_workers is None or shard_workers <= 0) and multiprocessing.parent_process() is not None:
+                # Already inside a file-pool worker, which took the detected
+                # budget: another pool per file would multiply it
+                shard_workers = 1
+            workers = min(resolve_workers(shard_workers), len(ranges))
+            if workers <= 1:
+                shards = list(map(_extract_shard, paths, firsts, lasts))
+            else:
+                with open_pool(workers) as pool:
+                    shards = list(pool.map(_extract_shard, paths, firsts, lasts))
+
+            store_line_table(pdf_path, concat_tables([shard_table for shard_table, _ in shards]), cache_dir,
+                             key=key)
+            return [block for _, merged in shards for block in merged]
+
+    if table is None:
+        table = load_line_table(pdf_path, cache_dir, key=key)
+    return merge_lines(line_text_blocks(table))
+
+
+def pick_sample_pages(page_count, sample_pages):
+    # Stratified sample: the middle page of each of `sample_pages` equal
+    # strata, plus the first, middle and last pages
+    picks = {1, (page_count + 1) // 2, page_count}
+    for stratum in range(sample_pages):
+        picks.add(1 + int((stratum + 0.5) * page_count / sample_pages))
+    return sorted(p for p in picks if 1 <= p <= page_count)
+
+
+def estimate_body_size(sampled, page_count, max_error=0.02):
+    # Ratio estimate of the average line size from sampled pages
+    # (page number → merged lines), with a 95% margin of error
+    counts = [len(blocks) for blocks in sampled.values()]
+    totals = [sum(block["size"] for block in blocks) for blocks in sampled.values()]
+    k = len(counts)
+    n = sum(counts)
+
+    estimate = {"avg_size": None, "margin": None, "sampled_pages": k,
+                "page_count": page_count, "stable": False}
+    if n == 0:
+        return estimate
+
+    avg_size = sum(totals) / n
+    if k >= page_count:
+        margin = 0.0  # every page was sampled
+    elif k < 2:
+        margin = float("inf")
+    else:
+        mean_count = n / k
+        residuals = sum((t - avg_size * c) ** 2 for t, c in zip(totals, counts)) / (k - 1)
+        variance = (1 - k / page_count) * residuals / (k * mean_count ** 2)
+        margin = 1.96 * variance ** 0.5
+
+    estimate.update(avg_size=avg_size, margin=margin, stable=margin <= max_error * avg_size)
+    return estimate
+
+
+def iter_page_headings(pdf_path, cache_dir=None, profile="1A", sample_pages=None,
+                       max_error=0.02, on_estimate=None):
+    # Streaming Steps 1–5: (page number, headings on that page sorted top to
+    # bottom). Memory stays bounded by one page rather than the whole document.
+    #
+    # The average line size comes either from a full first pass over the
+    # font size histogram, or, with sample_pages, from a stratified sample of
+    # pages. When the sample's margin of error is within max_error (relative)
+    # scoring starts right away in a single pass; otherwise it falls back to
+    # the full pass. on_estimate(estimate) receives the sample estimate.
+    key = document_key(pdf_path, cache_dir)  # hashed once for every pass below
+    sampled = {}
+    remaining = None  # pages not extracted yet (None = all of them)
+    avg_size = None
+    if sample_pages:
+        total_pages = cached_page_count(pdf_path, cache_dir, key)
+        pages = pick_sample_pages(total_pages, sample_pages)
+        sampled = dict(iter_merged_pages(pdf_path, cache_dir, pages, key))
+        remaining = [p for p in range(1, total_pages + 1) if p not in sampled]
+        estimate = estimate_body_size(sampled, total_pages, max_error)
+        estimate["file"] = os.path.basename(pdf_path)
+        if on_estimate:
+            on_estimate(estimate)
+        if estimate["stable"]:
+            avg_size = estimate["avg_size"]
+
+    def all_pages():
+        # Every page in order; sampled pages were already extracted and are reused
+        extracted = iter_merged_pages(pdf_path, cache_dir, remaining, key)
+        return heapq.merge(sampled.items(), extracted, key=itemgetter(0))
+
+    if avg_size is None:
+        font_sizes = defaultdict(int)
+        for _, page_blocks in all_pages():
+            add_font_sizes(font_sizes, page_blocks)
+        avg_size = average_font_size(font_sizes)
+
+    for page_num, page_blocks in all_pages():
+        page_headings = detect_headings(page_blocks, avg_size, profile)
+        page_headings.sort(key=lambda x: x["bbox"][1])
+        yield page_num, page_headings
+
+
+def print_estimate(estimate):
+    # on_estimate for the command line: the sampled body size and whether it was used
+    if estimate["avg_size"] is None:
+        print(f"  {estimate['file']}: no text on {estimate['sampled_pages']} sampled pages, full pass")
+        return
+    outcome = "single pass" if estimate["stable"] else "margin too wide, full pass"
+    print(f"  {estimate['file']}: body size {estimate['avg_size']:.2f} ± {estimate['margin']:.2f}pt "
+          f"from {estimate['sampled_pages']}/{estimate['page_count']} pages, {outcome}")
+
+
+def extract_outline(pdf_path, cache_dir=None, bookmarks="trust", profile="1A",
+                    levels=3, size_tolerance=0.0, stream=False, on_page=None,
+                    sample_pages=None, max_error=0.02, on_estimate=None,
+                    shard_pages=None, shard_workers=1):
+    if bookmarks not in BOOKMARK_MODES:
+        raise ValueError(f"Unknown bookmarks mode: {bookmarks}")
+
+    # Step 0: Embedded bookmarks, when usable and covering the document, make
+    # the full scan unnecessary; a partial tree is merged with the scan instead
+    bookmark_headings = read_bookmarks(pdf_path, levels) if bookmarks != "ignore" else None
+    if bookmark_headings and bookmarks == "trust" and covers_document(bookmark_headings, page_count(pdf_path)):
+        return build_outline(bookmark_headings)
+
+    if stream:
+        # Steps 1–5 page by page; on_page(page_num, page_headings) reports progress
+        headings = []
+        page_iter = iter_page_headings(pdf_path, cache_dir, profile, sample_pages, max_error, on_estimate)
+        for page_num, page_headings in page_iter:
+            headings.extend(page_headings)
+            if on_page:
+                on_page(page_num, page_headings)
+    else:
+        # Step 1–2: Extract all text lines (from the span cache when enabled,
+        # in page-range shards for long documents) and merge multi-line headings
+        text_blocks = load_merged_lines(pdf_path, cache_dir, shard_pages, shard_workers)
+
+        # Step 3: Font size analysis
+        avg_size = average_font_size(add_font_sizes(defaultdict(int), text_blocks))
+
+        # Step 4–5: Detect potential headings (batch-scored) and sort them
+        headings = detect_headings(text_blocks, avg_size, profile)
+        headings.sort(key=lambda x: (x["page"], x["bbox"][1]))
+
+    # Step 6: Assign levels from a size → rank table built once per document
+    size_ranks = size_rank_table(headings, size_tolerance)
+
+    outline_headings = [{
+        "level": determine_level(h, size_ranks, levels),
+        "text": h["text"],
+        "page": h["page"],
+        "y": h["bbox"][1]
+    } for h in headings]
+
+    if bookmark_headings:
+        outline_headings = merge_bookmarks(bookmark_headings, outline_headings)
+
+    return build_outline(outline_headings)
+
+
+def size_rank_table(headings, tolerance=0.0):
+    # Font size → rank (0 = largest). Sizes within `tolerance` of the largest
+    # size of a tier share that tier, so 11.9 and 12.0 can count as the same
+    # level without a run of close sizes chaining into one tier
+    ranks = {}
+    rank = -1
+    tier_top = None
+    for size in sorted(set(h["size"] for h in headings), reverse=True):
+        if tier_top is None or tier_top - size > tolerance:
+            rank += 1
+            tier_top = size
+        ranks[size] = rank
+    return ranks
+
+
+def determine_level(heading, size_ranks, levels=3):
+    text = heading["text"]
+    if re.match(r'^\d+\.\d+\.\d+', text):
+        return "H3"
+    elif re.match(r'^\d+\.\d+', text):
+        return "H2"
+    elif re.match(r'^\d+\.', text):
+        return "H1"
+    elif re.match(r'^Chapter\s+\d+', text, re.IGNORECASE):
+        return "H1"
+    elif re.match(r'^[IVXLCDM]+\.', text):
+        return "H1"
+
+    # The `levels` largest tiers map to H1..Hn; anything smaller stays H2
+    rank = size_ranks[heading["size"]]
+    return f"H{rank + 1}" if rank < levels else "H2"
+
+
+def is_new_section(heading_text):
+    return bool(re.match(r'^(Chapter|CHAPTER|Part|PART|Section|SECTION)\s+\w+', heading_text))
+
+
+def build_outline(headings):
+    # Step 7–9: Group by title sections (like CHAPTER 1, PART I, etc.)
     section_map = {}  # Map section title → section object
+    current_title = "Untitled Section"
 
     for h in headings:
-        level = determine_level(h, headings)
         text = h["text"]
-        page = h["page"]
 
         # Use section title if matched, else default
         if is_new_section(text):
             current_title = text
             continue  # Skip adding CHAPTER X itself to outline
 
-        # Use last seen chapter as current_title, else default
-        section_title = current_title if 'current_title' in locals() else "Untitled Section"
-
-        if section_title not in section_map:
-            section_map[section_title] = {
-                "title": section_title,
+        if current_title not in section_map:
+            section_map[current_title] = {
+                "title": current_title,
                 "outline": []
             }
 
-        section_map[section_title]["outline"].append({
-            "level": level,
+        section_map[current_title]["outline"].append({
+            "level": h["level"],
             "text": text,
-            "page": page
+            "page": h["page"]
         })
 
     sections = list(section_map.values())
 
-
-
-    if current_section["outline"]:
-        sections.append(current_section)
-
     return {
         "document_title": sections[0]["title"] if sections else "Untitled Document",
         "sections": sections
     }
 
 
-def process_all_pdfs(input_dir, output_dir):
-    if not os.path.exists(input_dir):
-        print(f"Input directory '{input_dir}' does not exist.")
-        return
-
-    pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")]
-    if not pdf_files:
-        print(f"No PDF files found in '{input_dir}'")
-        return
-
-    print(f"Processing {len(pdf_files)} PDF files...")
-    for filename in pdf_files:
-        try:
-            print(f"Processing: {filename}")
-            pdf_path = os.path.join(input_dir, filename)
-            result = extract_outline(pdf_path)
-
-            json_filename = filename.replace(".pdf", ".json")
-            json_path = os.path.join(output_dir, json_filename)
-
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-
-            print(f"  → Saved outline to: {json_filename}")
-            total_headings = sum(len(section["outline"]) for section in result["sections"])
-            print(f"  → Found {total_headings} headings in {len(result['sections'])} sections")
-
-        except Exception as e:
-            print(f"Error processing {filename}: {str(e)}")
+def process_all_pdfs(input_dir, output_dir, workers=1, cost_log=None, dry_run=False,
+                     max_tasks=None, max_rss_mb=None, **options):
+    # options are passed on to extract_outline
+    _process_all_pdfs(input_dir, output_dir, partial(extract_outline, **options), workers, cost_log, dry_run,
+                      max_tasks, max_rss_mb)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF Outline Extractor")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (0 = detect from CPU/memory limits)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse extracted spans across runs from this directory")
+    parser.add_argument("--bookmarks", choices=BOOKMARK_MODES, default="trust",
+                        help="trust embedded bookmarks, merge them with detected headings, or ignore them")
+    parser.add_argument("--profile", choices=PROFILES, default="1A",
+                        help="heading rule profile (1A drops dotted section numbers, 1B keeps them)")
+    parser.add_argument("--levels", type=int, default=3,
+                        help="number of heading levels assigned by font size (H1..Hn)")
+    parser.add_argument("--size-tolerance", type=float, default=0.0,
+                        help="font sizes this close (in pt) share a heading level")
+    parser.add_argument("--stream", action="store_true",
+                        help="process one page at a time to bound memory on very large PDFs")
+    parser.add_argument("--sample-pages", type=int, default=None,
+                        help="with --stream, estimate the body font size from about N sampled pages")
+    parser.add_argument("--shard-pages", type=int, default=None,
+                        help="split documents longer than N pages into N-page ranges extracted in parallel")
+    parser.add_argument("--shard-workers", type=int, default=0,
+                        help="worker processes per sharded document (0 = detect from CPU/memory limits)")
+    parser.add_argument("--cost-log", default=None,
+                        help="log predicted vs. actual seconds per PDF to this JSON lines file; the cost model is refitted from it")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only print the estimated time for the input directory")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=None,
+                        help="replace a worker process with a fresh one after N documents")
+    parser.add_argument("--max-worker-rss-mb", type=float, default=None,
+                        help="replace a worker once its resident memory passes this many MB; "
+                             "the document that crossed it is retried once in a fresh worker")
+    args = parser.parse_args()
+
     input_dir = r"E:\\ELC\\Adobe_Team_while-weTry-\\Part_1A\\input"
     output_dir = r"E:\\ELC\\Adobe_Team_while-weTry-\\Part_1A\\output"
 
@@ -272,6 +366,14 @@ if __name__ == "__main__":
     print("PDF Outline Extractor")
     print(f"Input directory: {input_dir}")
     print(f"Output directory: {output_dir}")
+    if args.workers <= 0 or (args.shard_pages and args.shard_workers <= 0):
+        print(describe_resources(detect_resources()))
     print("-" * 50)
 
-    process_all_pdfs(input_dir, output_dir)
\ No newline at end of file
+    process_all_pdfs(input_dir, output_dir, workers=args.workers, cache_dir=args.cache_dir,
+                     bookmarks=args.bookmarks, profile=args.profile, levels=args.levels,
+                     size_tolerance=args.size_tolerance, stream=args.stream,
+                     sample_pages=args.sample_pages, on_estimate=print_estimate if args.sample_pages else None,
+                     shard_pages=args.shard_pages,
+                     shard_workers=args.shard_workers, cost_log=args.cost_log, dry_run=args.dry_run,
+                     max_tasks=args.max_tasks_per_worker, max_rss_mb=args.max_worker_rss_mb)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import fitz  # PyMuPDF
+import re
+
+# How extract_outline uses embedded bookmarks:
+#   trust  - build the outline from the bookmarks alone when they are usable
+#   merge  - scan as usual, then merge bookmarks with the detected headings
+#   ignore - never look at bookmarks
+BOOKMARK_MODES = ("trust", "merge", "ignore")
+
+# A tree covers the document when it starts within the first COVER_FIRST_PAGE
+# pages and its bookmarked pages span at least COVER_SPAN of the page count
+COVER_FIRST_PAGE = 2
+COVER_SPAN = 0.75
+
+def read_bookmarks(pdf_path, levels=3):
+    # Outline entries from the PDF's bookmark tree, or None when it isn't usable
+    doc = fitz.open(pdf_path)
+    try:
+        toc = doc.get_toc()
+        page_count = doc.page_count
+    finally:
+        doc.close()
+
+    valid = []
+    for depth, title, page in toc:
+        text = " ".join(title.split())
+        if text and 1 <= page <= page_count:
+            valid.append((depth, text, page))  # skip unnamed or dangling bookmarks
+
+    # Depth is relative to the shallowest usable bookmark; anything deeper
+    # than `levels` stays at the deepest level
+    top = min((depth for depth, _, _ in valid), default=1)
+    headings = [{
+        "level": f"H{min(depth - top + 1, levels)}",
+        "text": text,
+        "page": page
+    } for depth, text, page in valid]
+
+    # Trust the tree only if it's more than a stub and mostly points at real pages
+    if len(headings) < 2 or len(headings) * 2 < len(toc):
+        return None
+    return headings
+
+
+def covers_document(headings, page_count):
+    # Whether bookmarks can stand in for the page scan; a partial tree (say,
+    # only the last chapter of a guide) would drop the other pages' headings
+    pages = [h["page"] for h in headings]
+    first, last = min(pages), max(pages)
+    return first <= COVER_FIRST_PAGE and last - first + 1 >= COVER_SPAN * page_count
+
+
+def _match_key(text):
+    # Bookmarks often keep the "1.2.3" numbering that the detected text lacks
+    text = re.sub(r'^\d+(\.\d+)*\.?\s+', '', text)
+    return " ".join(text.lower().split())
+
+
+def merge_bookmarks(bookmarks, detected):
+    # detected: outline entries from the scan, each with a "y" for ordering.
+    # Bookmarks win on level; scan-only headings fill in what they lack.
+    detected_by_key = {}
+    for h in detected:
+        detected_by_key.setdefault((h["page"], _match_key(h["text"])), h)
+
+    merged = []
+    matched = set()
+    page, y = None, -1
+    for order, b in enumerate(bookmarks):
+        h = detected_by_key.get((b["page"], _match_key(b["text"])))
+        if h is not None:
+            matched.add(id(h))
+            y = h["y"]
+        elif b["page"] != page:
+            y = -1  # unmatched: top of its page, or just after the previous bookmark
+        page = b["page"]
+        merged.append((page, y, 0, order, b))
+
+    for order, h in enumerate(detected):
+        if id(h) not in matched:
+            merged.append((h["page"], h["y"], 1, order, {
+                "level": h["level"],
+                "text": h["text"],
+                "page": h["page"]
+            }))
+
+    merged.sort(key=lambda m: m[:4])
+    return [m[4] for m in merged]
@@ -0,0 +1,94 @@
+import fitz  # PyMuPDF
+import heapq
+import json
+import os
+
+import numpy as np
+
+# Predicted extraction seconds = intercept + Σ coefficient × feature. The
+# defaults were fitted on the bundled sample PDFs (full scan, no bookmarks);
+# with a cost log, the model is refitted from logged runs instead. Feature
+# coefficients are kept non-negative (see fit_model).
+FEATURES = ("pages", "content_kb", "mb")
+DEFAULT_MODEL = {"intercept": -0.0079, "pages": 0.0017, "content_kb": 0.00017, "mb": 0.0017}
+MIN_SECONDS = 0.005
+MIN_RECORDS = 8  # logged runs needed before refitting
+
+SAMPLE_PAGES = 3
+
+
+def document_features(pdf_path):
+    # Cheap pre-pass: page count, file size, and the content stream size of
+    # the first, middle and last pages (a proxy for text-object density),
+    # extrapolated to the whole document
+    doc = fitz.open(pdf_path)
+    try:
+        pages = doc.page_count
+        sample = sorted({0, pages // 2, pages - 1}) if pages else []
+        content = sum(len(doc[i].read_contents()) for i in sample)
+    finally:
+        doc.close()
+
+    return {
+        "pages": pages,
+        "content_kb": content / len(sample) * pages / 1024 if sample else 0.0,
+        "mb": os.path.getsize(pdf_path) / (1024 * 1024)
+    }
+
+
+def predict_seconds(model, features):
+    seconds = model["intercept"] + sum(model[name] * features[name] for name in FEATURES)
+    return max(seconds, MIN_SECONDS)
+
+
+def read_cost_log(cost_log):
+    if not cost_log or not os.path.exists(cost_log):
+        return []
+    with open(cost_log, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fit_model(records):
+    # Least-squares fit of the model to logged (features, actual seconds)
+    # records, with non-negative feature coefficients: a feature whose
+    # coefficient comes out negative (say, file size on a few small PDFs)
+    # is dropped and the rest refitted, so a big document is never
+    # predicted cheaper than a small one with the same other features
+    X = np.array([[1.0] + [record["features"][name] for name in FEATURES] for record in records])
+    y = np.array([record["actual"] for record in records])
+    active = list(range(len(FEATURES) + 1))
+    while True:
+        coefficients = np.zeros(len(FEATURES) + 1)
+        coefficients[active] = np.linalg.lstsq(X[:, active], y, rcond=None)[0]
+        worst = min(active[1:], key=lambda i: coefficients[i], default=None)
+        if worst is None or coefficients[worst] >= 0:
+            break
+        active.remove(worst)
+    return dict(zip(("intercept",) + FEATURES, coefficients.tolist()))
+
+def load_model(cost_log=None):
+    # The default model, or one refitted from the cost log once it has enough runs
+    records = read_cost_log(cost_log)
+    if len(records) < MIN_RECORDS:
+        return DEFAULT_MODEL
+    return fit_model(records)
+
+
+def log_costs(cost_log, records):
+    # Appends one JSON line per document: features, predicted and actual seconds
+    with open(cost_log, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def lpt_order(costs):
+    # Indexes, most expensive first (longest processing time scheduling)
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+
+def estimate_wall_time(costs, workers):
+    # Makespan of LPT scheduling: each job goes to the least loaded worker
+    loads = [0.0] * max(min(workers, len(costs)), 1)
+    for i in lpt_order(costs):
+        heapq.heapreplace(loads, loads[0] + costs[i])
+    return max(loads)
@@ -0,0 +1,218 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+HEADING_THRESHOLD = 4
+
+FALSE_WORDS = [
+    'figure', 'table', 'chart', 'image', 'appendix', 'references', 'index',
+    'www.', 'http', 'copyright', 'licensed to', '<null>', 'all rights reserved'
+]
+
+# Extra citation/reference filters
+CITATION_PATTERNS = [
+    r'\(\d{4}\)',                                # (1995)
+    r'\d{4}[:\-]\s*\d+(-\d+)?',                  # 1995: 273 or 1995-273
+    r'\bvol\.?\s*\d+\b',                         # vol. 20
+    r'\bno\.?\s*\d+\b',                          # no. 3
+    r'\bpp?\.?\s*\d+(-\d+)?\b',                  # p. 23 or pp. 273-297
+    r'\b[A-Z]\.\s*[A-Z]\.',                      # A. M.
+    r'\b\d+\s*\(\d{4}\)',                        # 59 (1950)
+    r'“[^”]{5,}”',                               # “Quoted title”
+    r'"[^"]{5,}"',                               # "Quoted title"
+    r'\b[A-Z][a-z]+,\s*[A-Z]\.([A-Z]\.)?',       # Last, F. or Last, F.M.
+    r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b',       # Full name (e.g., Vladimir Vapnik, Alexey Chervonenkis)
+    r'\b[A-Z][a-z]+\s+[A-Z]\.',                  # First Last initials (e.g., Alexey C.)
+    r'\bIn\s+Proceedings\b.*?\d{4}',             # In Proceedings ... 2020
+    r'\(\d{4}\):\s*\d+(-\d+)?',                  # (1995): 273–297
+    r'\[\d+\]',                                  # [1], [23]
+    r'(?<!\d)\d{4}(?!\d)',                       # Standalone 4-digit year, avoids matching 12345
+]
+
+# Text rules added on top of the layout score. `kind` decides how a rule runs:
+#   cases     - patterns anchored at the start of the line; the first match adds its weight
+#   match     - one pattern anchored at the start of the line
+#   words     - any of the words occurs in the lowercased line
+#   citations - weight[1] for two or more citation hits, weight[0] for one hit on a line over 50 chars
+#   digits    - the line is two or more bare numbers ("0 1", "2 3")
+# Rules run cheapest first. A terminal rule rejects the line outright.
+# `lead` lists the characters a positive case can start with ("digit" = any
+# decimal digit), which lets callers skip lines that can never gain a bonus.
+COMMON_RULES = [
+    {"name": "digit_words", "kind": "digits", "cost": 1, "terminal": True},
+    {"name": "bare_number", "kind": "match", "pattern": r'\d+(\.\d+)*\.?$', "weight": -5, "cost": 1},
+    {"name": "false_words", "kind": "words", "words": FALSE_WORDS, "weight": -3, "cost": 2},
+    {"name": "citations", "kind": "citations", "patterns": CITATION_PATTERNS, "weight": (-4, -6), "cost": 8},
+]
+
+NUMBERED_FORMATS = {
+    # Part 1A keeps dotted section numbers ("2.2.11 Introduction") out of the outline
+    "1A": {"pattern": r'\d+(\.\d+)+\s+\w+', "weight": -5},
+    # The Part 1B outline extractor promotes any numbered line ("3 Results")
+    "1B": {"pattern": r'\d+(\.\d+)*\s+\w+', "weight": 4, "lead": "digit"},
+}
+
+
+def profile_rules(profile):
+    numbered = {
+        "name": "numbered_format", "kind": "cases", "cost": 1,
+        "cases": [
+            NUMBERED_FORMATS[profile],
+            {"pattern": r'(?i:Chapter)\s+\d+', "weight": 4, "lead": "Cc"},
+            {"pattern": r'[IVXLCDM]+\.\s+', "weight": 3, "lead": "IVXLCDM"},
+        ]
+    }
+    return [numbered] + COMMON_RULES
+
+
+PROFILES = tuple(NUMBERED_FORMATS)
+
+CompiledRule = namedtuple("CompiledRule", ["name", "cost", "low", "high", "terminal", "evaluate"])
+
+
+def _compile_rule(rule):
+    kind = rule["kind"]
+
+    if kind == "cases":
+        # One alternation of named groups: at position 0 the regex engine tries
+        # the alternatives in order, so the first matching case still wins
+        cases = rule["cases"]
+        combined = re.compile("|".join(
+            f"(?P<c{i}>{case['pattern']})" for i, case in enumerate(cases)
+        ))
+        weights = {f"c{i}": case["weight"] for i, case in enumerate(cases)}
+
+        def evaluate(text):
+            m = combined.match(text)
+            return weights[m.lastgroup] if m else 0
+
+        low = min([0] + list(weights.values()))
+        high = max([0] + list(weights.values()))
+
+    elif kind == "match":
+        pattern = re.compile(rule["pattern"])
+        weight = rule["weight"]
+
+        def evaluate(text):
+            return weight if pattern.match(text) else 0
+
+        low, high = min(0, weight), max(0, weight)
+
+    elif kind == "words":
+        # Substring automaton over the lowercased line
+        automaton = re.compile("|".join(re.escape(w) for w in rule["words"]))
+        weight = rule["weight"]
+
+        def evaluate(text):
+            return weight if automaton.search(text.lower()) else 0
+
+        low, high = min(0, weight), max(0, weight)
+
+    elif kind == "citations":
+        patterns = [re.compile(p) for p in rule["patterns"]]
+        # Most lines hit none of them, which one combined search settles
+        screen = re.compile("|".join(f"(?:{p})" for p in rule["patterns"]))
+        one_hit, many_hits = rule["weight"]
+
+        def evaluate(text):
+            if not screen.search(text):
+                return 0
+            hits = 0
+            for pattern in patterns:
+                if pattern.search(text):
+                    hits += 1
+                    if hits >= 2:
+                        return many_hits
+            return one_hit if hits == 1 and len(text) > 50 else 0
+
+        low, high = min(0, one_hit, many_hits), max(0, one_hit, many_hits)
+
+    elif kind == "digits":
+        def evaluate(text):
+            words = text.split()
+            digit_words = sum(1 for w in words if w.isdigit())
+            if digit_words >= 2 and digit_words == len(words):
+                return None
+            return 0
+
+        low, high = 0, 0
+
+    else:
+        raise ValueError(f"Unknown rule kind: {kind}")
+
+    return CompiledRule(rule["name"], rule["cost"], low, high, rule.get("terminal", False), evaluate)
+
+
+class HeadingRules:
+    # A compiled rule profile: evaluates the text rules of one line against the threshold
+
+    def __init__(self, rules, threshold=HEADING_THRESHOLD):
+        self.threshold = threshold
+        self.rules = sorted((_compile_rule(r) for r in rules), key=lambda r: r.cost)
+
+        # Bounds on what the rules from i onwards can still add
+        n = len(self.rules)
+        self._low = [0] * (n + 1)
+        self._high = [0] * (n + 1)
+        self._terminal = [False] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            rule = self.rules[i]
+            self._low[i] = self._low[i + 1] + rule.low
+            self._high[i] = self._high[i + 1] + rule.high
+            self._terminal[i] = self._terminal[i + 1] or rule.terminal
+        self.max_bonus = self._high[0]
+
+        # Which first characters can lead to a bonus (None = any)
+        self.lead_chars = ""
+        self.lead_digits = False
+        for rule in rules:
+            cases = rule["cases"] if rule["kind"] == "cases" else [rule]
+            for case in cases:
+                if not isinstance(case.get("weight"), int) or case["weight"] <= 0:
+                    continue
+                lead = case.get("lead")
+                if lead is None:
+                    self.lead_chars = None
+                elif self.lead_chars is not None:
+                    if lead == "digit":
+                        self.lead_digits = True
+                    else:
+                        self.lead_chars += lead
+
+    def can_gain(self, text):
+        # False only when no rule can add a bonus to this line
+        if self.lead_chars is None:
+            return True
+        first = text[:1]
+        return bool(first) and (first in self.lead_chars or (self.lead_digits and first.isdecimal()))
+
+    def score(self, text):
+        # Full text score (every rule), or None if a terminal rule rejects the line
+        total = 0
+        for rule in self.rules:
+            delta = rule.evaluate(text)
+            if delta is None:
+                return None
+            total += delta
+        return total
+
+    def accepts(self, text, base_score):
+        # Same verdict as score(), but stops once the outcome can't change
+        score = base_score
+        for i, rule in enumerate(self.rules):
+            if score + self._high[i] < self.threshold:
+                return False
+            if score + self._low[i] >= self.threshold and not self._terminal[i]:
+                return True
+            delta = rule.evaluate(text)
+            if delta is None:
+                return False
+            score += delta
+        return score >= self.threshold
+
+
+@lru_cache(maxsize=None)
+def compile_profile(profile):
+    if profile not in NUMBERED_FORMATS:
+        raise ValueError(f"Unknown heading rule profile: {profile}")
+    return HeadingRules(profile_rules(profile))
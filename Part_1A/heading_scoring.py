@@ -0,0 +1,51 @@
+from operator import methodcaller
+
+import numpy as np
+
+from heading_rules import HEADING_THRESHOLD, compile_profile
+
+
+def line_columns(blocks, rules):
+    # Columnar view of the merged lines for batch scoring
+    n = len(blocks)
+    texts = [block["text"] for block in blocks]
+    return {
+        "size": np.fromiter((block["size"] for block in blocks), dtype=np.float64, count=n),
+        "length": np.fromiter(map(len, texts), dtype=np.int64, count=n),
+        "words": np.fromiter(map(len, map(str.split, texts)), dtype=np.int64, count=n),
+        "upper": np.fromiter(map(str.isupper, texts), dtype=bool, count=n),
+        "period": np.fromiter(map(methodcaller("endswith", "."), texts), dtype=bool, count=n),
+        "bonus": np.fromiter(map(rules.can_gain, texts), dtype=bool, count=n),
+    }
+
+
+def layout_scores(columns, avg_size):
+    # Font size, case and length part of the heading score, for every line at once
+    size = columns["size"]
+    length = columns["length"]
+
+    score = np.select(
+        [size > avg_size * 1.2, size > avg_size * 1.1, size > avg_size],
+        [3, 2, 1],
+        default=0
+    )
+    score += 2 * (columns["upper"] & (length >= 3) & (length <= 50))
+    score += (columns["words"] <= 8) & ~columns["period"]
+    score += length <= 100
+    score -= 3 * (length > 200)
+    return score
+
+
+def detect_headings(blocks, avg_size, profile="1A"):
+    # Batch layout scoring; the text rules only run on lines that can still
+    # reach the threshold, and stop as soon as the outcome is settled
+    if not blocks:
+        return []
+
+    rules = compile_profile(profile)
+    columns = line_columns(blocks, rules)
+    scores = layout_scores(columns, avg_size)
+    best_case = scores + rules.max_bonus * columns["bonus"]
+    candidates = np.flatnonzero(best_case >= HEADING_THRESHOLD)
+
+    return [blocks[i] for i in candidates.tolist() if rules.accepts(blocks[i]["text"], int(scores[i]))]
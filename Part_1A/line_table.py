@@ -0,0 +1,219 @@
+import fitz  # PyMuPDF
+import numpy as np
+from collections import deque
+
+# Bump whenever the extracted columns change so stale cache entries are ignored
+EXTRACTOR_VERSION = 1
+
+# Text page flags for extraction: the usual "dict" flags minus image
+# preservation. Image blocks carry no lines, but decoding their pixel data
+# into the dict dominated extraction time on image-heavy pages.
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Span texts are stored back to back in one text arena; start/end are character
+# offsets into it. A line's text is arena[start:end] over its spans.
+LINE_DTYPE = np.dtype([
+    ("page", "<i4"),         # 1-based page number
+    ("size", "<f8"),         # mean span size (unrounded)
+    ("flags", "<i4"),        # OR of span flags
+    ("span_count", "<i4"),
+    ("x0", "<f8"), ("y0", "<f8"), ("x1", "<f8"), ("y1", "<f8"),
+    ("start", "<i8"), ("end", "<i8")
+])
+
+SPAN_DTYPE = np.dtype([
+    ("line", "<i4"),         # row in the line table
+    ("size", "<f8"),
+    ("flags", "<i4"),
+    ("x0", "<f8"), ("y0", "<f8"), ("x1", "<f8"), ("y1", "<f8"),
+    ("start", "<i8"), ("end", "<i8")
+])
+
+
+def _append_page_rows(page, page_num, lines, spans, texts, offset, textpage=None):
+    # Adds one page's line and span rows; returns the new text offset
+    for block in page.get_text("dict", flags=TEXT_FLAGS, textpage=textpage)["blocks"]:
+        for line in block.get("lines", []):
+            line_index = len(lines)
+            line_start = offset
+            line_size = 0
+            line_flags = 0
+            span_count = 0
+
+            for span in line.get("spans", []):
+                text = span.get("text", "")
+                size = span.get("size", 0)
+                flags = span.get("flags", 0)
+                bbox = span.get("bbox", (0, 0, 0, 0))
+                spans.append((line_index, size, flags, *bbox, offset, offset + len(text)))
+                texts.append(text)
+                offset += len(text)
+                line_size += size
+                line_flags |= flags
+                span_count += 1
+
+            mean_size = line_size / span_count if span_count else 0.0
+            lines.append((page_num, mean_size, line_flags, span_count,
+                          *line["bbox"], line_start, offset))
+    return offset
+
+
+def _table(meta, lines, spans, texts):
+    return {
+        "meta": meta,
+        "lines": np.array(lines, dtype=LINE_DTYPE),
+        "spans": np.array(spans, dtype=SPAN_DTYPE),
+        "text": "".join(texts)
+    }
+
+
+def extract_line_table(pdf_path, pages=None):
+    # Whole-document table, or only the given (ascending, 1-based) pages
+    doc = fitz.open(pdf_path)
+    lines = []
+    spans = []
+    texts = []
+    offset = 0
+
+    try:
+        meta = {
+            "page_count": doc.page_count,
+            "title": doc.metadata.get("title", "")
+        }
+
+        for page_num in (range(1, doc.page_count + 1) if pages is None else pages):
+            offset = _append_page_rows(doc[page_num - 1], page_num, lines, spans, texts, offset)
+    finally:
+        doc.close()
+
+    return _table(meta, lines, spans, texts)
+
+
+def extract_matching_pages(pdf_path, keep_text, margin=0):
+    # Like extract_line_table, but only the pages worth it get span rows: the
+    # first page, pages whose plain text passes keep_text(text), and `margin`
+    # pages either side of those. Each page's text page is built once and
+    # serves both the plain text and the span dicts.
+    doc = fitz.open(pdf_path)
+    lines = []
+    spans = []
+    texts = []
+    offset = 0
+    hit_pages = 0
+    parsed_pages = 0
+    keep_until = 1
+    pending = deque()  # skipped pages a later hit may still pull in
+
+    try:
+        meta = {
+            "page_count": doc.page_count,
+            "title": doc.metadata.get("title", "")
+        }
+
+        for page_num, page in enumerate(doc, start=1):
+            textpage = page.get_textpage(flags=TEXT_FLAGS)
+            if keep_text(textpage.extractText()):
+                hit_pages += 1
+                keep_until = page_num + margin
+                while pending:
+                    skipped, skipped_num, skipped_textpage = pending.popleft()
+                    offset = _append_page_rows(skipped, skipped_num, lines, spans, texts, offset,
+                                               skipped_textpage)
+                    parsed_pages += 1
+
+            if page_num <= keep_until:
+                offset = _append_page_rows(page, page_num, lines, spans, texts, offset, textpage)
+                parsed_pages += 1
+            elif margin:
+                pending.append((page, page_num, textpage))
+                if len(pending) > margin:
+                    pending.popleft()
+    finally:
+        doc.close()
+
+    meta["hit_pages"] = hit_pages
+    meta["parsed_pages"] = parsed_pages
+    return _table(meta, lines, spans, texts)
+
+
+def iter_page_tables(pdf_path, pages=None):
+    # (page number, one-page line table) for each page, or only for the given
+    # 1-based page numbers; only the current page is held in memory
+    doc = fitz.open(pdf_path)
+    try:
+        meta = {"page_count": doc.page_count}
+        for page_num in (range(1, doc.page_count + 1) if pages is None else pages):
+            lines, spans, texts = [], [], []
+            _append_page_rows(doc[page_num - 1], page_num, lines, spans, texts, 0)
+            yield page_num, _table(meta, lines, spans, texts)
+    finally:
+        doc.close()
+
+
+def split_table_pages(table, pages=None):
+    # Same as iter_page_tables, but over an already extracted (or cached) table.
+    # Line rows are sliced per page; text offsets still point into the shared arena.
+    page_column = table["lines"]["page"]
+    for page_num in (range(1, table["meta"]["page_count"] + 1) if pages is None else pages):
+        start, end = np.searchsorted(page_column, [page_num, page_num + 1])
+        yield page_num, {"meta": table["meta"], "lines": table["lines"][start:end], "text": table["text"]}
+
+
+def page_ranges(page_count, shard_pages):
+    # Consecutive (first, last) 1-based page ranges of at most shard_pages pages
+    return [(first, min(first + shard_pages - 1, page_count))
+            for first in range(1, page_count + 1, shard_pages)]
+
+
+def concat_tables(tables):
+    # Tables of consecutive page ranges, in page order, joined into the table
+    # extract_line_table builds for the whole document: span line indexes and
+    # text offsets are shifted past the preceding tables
+    lines = []
+    spans = []
+    line_offset = 0
+    text_offset = 0
+    for table in tables:
+        table_lines = table["lines"].copy()
+        table_lines["start"] += text_offset
+        table_lines["end"] += text_offset
+        table_spans = table["spans"].copy()
+        table_spans["line"] += line_offset
+        table_spans["start"] += text_offset
+        table_spans["end"] += text_offset
+        lines.append(table_lines)
+        spans.append(table_spans)
+        line_offset += len(table_lines)
+        text_offset += len(table["text"])
+
+    return {
+        "meta": dict(tables[0]["meta"]),
+        "lines": np.concatenate(lines),
+        "spans": np.concatenate(spans),
+        "text": "".join(table["text"] for table in tables)
+    }
+
+
+def page_count(pdf_path):
+    doc = fitz.open(pdf_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def line_text_blocks(table):
+    # The Part 1A line dicts: non-empty lines with the mean span size rounded to 0.1
+    text = table["text"]
+    blocks = []
+    for page, size, flags, span_count, x0, y0, x1, y1, start, end in table["lines"].tolist():
+        line_text = text[start:end].strip()
+        if line_text and span_count > 0:
+            blocks.append({
+                "text": line_text,
+                "size": round(size, 1),
+                "page": page,
+                "flags": flags,
+                "bbox": (x0, y0, x1, y1)
+            })
+    return blocks
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+from functools import partial
+
+from cost_model import (MIN_SECONDS, document_features, estimate_wall_time, load_model, log_costs, lpt_order,
+                        predict_seconds)
+from resource_limits import detect_resources
+from worker_pool import iter_recycled, open_pool
+
+
+def list_pdf_files(input_dir):
+    return [f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")]
+
+
+def resolve_workers(workers):
+    # 0 (or less) means auto-detect from the CPUs and memory actually
+    # available (cgroup limits included, see resource_limits)
+    if workers is None or workers <= 0:
+        return detect_resources()["workers"]
+    return workers
+
+
+def _extract_one(extract_fn, pdf_path):
+    # Runs inside a worker process: extract_fn opens its own fitz document,
+    # and errors are returned instead of raised so one bad file can't break the pool.
+    # Returns (ok, result_or_error, seconds).
+    start = time.perf_counter()
+    try:
+        return True, extract_fn(pdf_path), time.perf_counter() - start
+    except Exception as e:
+        return False, str(e), time.perf_counter() - start
+
+
+def iter_outlines(extract_fn, pdf_paths, workers=1, costs=None, max_tasks=None, max_rss_mb=None):
+    # Yields (pdf_path, ok, result_or_error, seconds) in the same order as
+    # pdf_paths. With costs (predicted seconds per path) the pool is fed the
+    # most expensive documents first, so no long one is left for the tail.
+    # max_tasks / max_rss_mb recycle workers (see worker_pool.iter_recycled).
+    recycle = max_tasks is not None or max_rss_mb is not None
+    if (workers <= 1 and not recycle) or len(pdf_paths) <= 1:
+        for pdf_path in pdf_paths:
+            yield (pdf_path,) + _extract_one(extract_fn, pdf_path)
+        return
+
+    order = lpt_order(costs) if costs is not None else range(len(pdf_paths))
+    if recycle:
+        # Results arrive as they finish; hold them back to keep pdf_paths order
+        finished = {}
+        next_index = 0
+        for index, result, error in iter_recycled(partial(_extract_one, extract_fn), pdf_paths,
+                                                  max(workers, 1), order, max_tasks, max_rss_mb):
+            finished[index] = result if error is None else (False, error, 0.0)
+            while next_index in finished:
+                yield (pdf_paths[next_index],) + finished.pop(next_index)
+                next_index += 1
+        return
+
+    with open_pool(min(workers, len(pdf_paths))) as pool:
+        futures = {}
+        for i in order:
+            futures[i] = pool.submit(_extract_one, extract_fn, pdf_paths[i])
+        for i, pdf_path in enumerate(pdf_paths):
+            yield (pdf_path,) + futures[i].result()
+
+
+def estimate_costs(pdf_paths, model):
+    # (features, predicted seconds) per path; unreadable files get the minimum cost
+    estimates = []
+    for pdf_path in pdf_paths:
+        try:
+            features = document_features(pdf_path)
+            estimates.append((features, predict_seconds(model, features)))
+        except Exception:
+            estimates.append((None, MIN_SECONDS))
+    return estimates
+
+
+def print_dry_run(pdf_files, estimates, workers):
+    for filename, (features, seconds) in zip(pdf_files, estimates):
+        pages = features["pages"] if features else "?"
+        print(f"  {seconds:8.2f}s  {pages:>5} pages  {filename}")
+    costs = [seconds for _, seconds in estimates]
+    print(f"Estimated time: {sum(costs):.2f}s serial, "
+          f"{estimate_wall_time(costs, workers):.2f}s wall with {workers} worker(s)")
+
+
+def process_all_pdfs(input_dir, output_dir, extract_fn, workers=1, cost_log=None, dry_run=False,
+                     max_tasks=None, max_rss_mb=None):
+    # cost_log: JSON lines file of predicted vs. actual seconds per document;
+    # it is appended to after the run and used to refit the cost model.
+    # dry_run: only print the estimated wall time for the directory.
+    # max_tasks / max_rss_mb: recycle a worker after that many documents or
+    # once its resident memory passes that many MB.
+    if not os.path.exists(input_dir):
+        print(f"Input directory '{input_dir}' does not exist.")
+        return
+
+    pdf_files = list_pdf_files(input_dir)
+    if not pdf_files:
+        print(f"No PDF files found in '{input_dir}'")
+        return
+
+    workers = resolve_workers(workers)
+    pdf_paths = [os.path.join(input_dir, f) for f in pdf_files]
+
+    # Cost pre-pass, only when something uses it
+    estimates = None
+    if workers > 1 or cost_log or dry_run:
+        estimates = estimate_costs(pdf_paths, load_model(cost_log))
+    if dry_run:
+        print_dry_run(pdf_files, estimates, workers)
+        return
+    costs = [seconds for _, seconds in estimates] if estimates else None
+
+    print(f"Processing {len(pdf_files)} PDF files...")
+    if workers > 1:
+        print(f"Using {workers} worker processes")
+
+    start = time.perf_counter()
+    records = []
+    outlines = iter_outlines(extract_fn, pdf_paths, workers, costs, max_tasks, max_rss_mb)
+    for i, (_, ok, payload, seconds) in enumerate(outlines):
+        filename = pdf_files[i]
+        if estimates and estimates[i][0] is not None:
+            records.append({"file": filename, "features": estimates[i][0],
+                            "predicted": round(estimates[i][1], 4), "actual": round(seconds, 4)})
+        try:
+            print(f"Processing: {filename}")
+            if not ok:
+                raise RuntimeError(payload)
+            result = payload
+
+            json_filename = filename.replace(".pdf", ".json")
+            json_path = os.path.join(output_dir, json_filename)
+
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+
+            print(f"  → Saved outline to: {json_filename}")
+            total_headings = sum(len(section["outline"]) for section in result["sections"])
+            print(f"  → Found {total_headings} headings in {len(result['sections'])} sections")
+
+        except Exception as e:
+            print(f"Error processing {filename}: {str(e)}")
+
+    if estimates:
+        print(f"Estimated {estimate_wall_time(costs, workers):.2f}s, "
+              f"took {time.perf_counter() - start:.2f}s")
+    if cost_log and records:
+        log_costs(cost_log, records)
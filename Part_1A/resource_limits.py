@@ -0,0 +1,138 @@
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Under Docker/Kubernetes os.cpu_count() reports the host's cores; the
+# container's real CPU quota and memory limit live in its cgroup
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+WORKERS_ENV = "PDF_WORKERS"                  # worker count, overrides detection
+MEMORY_MB_ENV = "PDF_MEMORY_MB"              # memory budget, overrides detection
+WORKER_MEMORY_MB_ENV = "PDF_WORKER_MEMORY_MB"
+DEFAULT_WORKER_MEMORY_MB = 512               # budget per worker process
+
+_UNLIMITED_BYTES = 1 << 60  # cgroup v1 reports "no limit" as a huge number
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_dirs(controller):
+    # Candidate directories holding this process's cgroup v2 files, then v1
+    # files for the controller: its own cgroup first, then the mount root
+    # (inside a container the namespace usually makes them the same)
+    v2 = []
+    v1 = []
+    for line in (_read("/proc/self/cgroup") or "").splitlines():
+        hierarchy, controllers, path = line.split(":", 2)
+        path = path.lstrip("/")
+        if hierarchy == "0" and not controllers:
+            v2.append(os.path.join(CGROUP_ROOT, path))
+        elif controller in controllers.split(","):
+            v1.append(os.path.join(CGROUP_ROOT, controllers, path))
+    return v2 + [CGROUP_ROOT], v1 + [os.path.join(CGROUP_ROOT, controller)]
+
+
+def cpu_quota():
+    # (CPUs allowed by the cgroup CPU quota, source file), or (None, None) without a quota
+    v2_dirs, v1_dirs = _cgroup_dirs("cpu")
+    for directory in v2_dirs:
+        value = _read(os.path.join(directory, "cpu.max"))
+        if value:
+            quota, period = value.split()
+            if quota == "max":
+                return None, None
+            return int(quota) / int(period), "cgroup cpu.max"
+
+    for directory in v1_dirs:
+        quota = _read(os.path.join(directory, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(directory, "cpu.cfs_period_us"))
+        if quota and period:
+            if int(quota) <= 0:
+                return None, None
+            return int(quota) / int(period), "cgroup cpu.cfs_quota_us"
+    return None, None
+
+
+def memory_limit_mb():
+    # (cgroup memory limit in MB, source file), or (None, None) without a limit
+    v2_dirs, v1_dirs = _cgroup_dirs("memory")
+    for directory in v2_dirs:
+        value = _read(os.path.join(directory, "memory.max"))
+        if value:
+            if value == "max":
+                return None, None
+            return int(value) // (1024 * 1024), "cgroup memory.max"
+
+    for directory in v1_dirs:
+        value = _read(os.path.join(directory, "memory.limit_in_bytes"))
+        if value:
+            if int(value) >= _UNLIMITED_BYTES:
+                return None, None
+            return int(value) // (1024 * 1024), "cgroup memory.limit_in_bytes"
+    return None, None
+
+
+def current_rss_mb():
+    # Resident set size of this process in MB: current from /proc on Linux,
+    # otherwise the peak reported by getrusage (None if neither is available)
+    statm = _read("/proc/self/statm")
+    if statm:
+        return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def detect_resources():
+    # Worker count and memory budget for the process pools: CPUs usable by
+    # this process (affinity, capped by the cgroup quota), further capped so
+    # that every worker gets its share of the memory budget. PDF_WORKERS and
+    # PDF_MEMORY_MB override detection.
+    if hasattr(os, "sched_getaffinity"):
+        cpus, cpu_source = len(os.sched_getaffinity(0)), "CPU affinity"
+    else:
+        cpus, cpu_source = os.cpu_count() or 1, "os.cpu_count()"
+    quota, quota_source = cpu_quota()
+    if quota is not None and quota < cpus:
+        cpus, cpu_source = max(int(quota), 1), quota_source
+
+    if os.environ.get(MEMORY_MB_ENV):
+        memory_mb, memory_source = int(os.environ[MEMORY_MB_ENV]), MEMORY_MB_ENV
+    else:
+        memory_mb, memory_source = memory_limit_mb()
+    worker_memory_mb = int(os.environ.get(WORKER_MEMORY_MB_ENV, DEFAULT_WORKER_MEMORY_MB))
+
+    workers, workers_source = cpus, cpu_source
+    if memory_mb is not None and memory_mb // worker_memory_mb < workers:
+        workers, workers_source = max(memory_mb // worker_memory_mb, 1), memory_source
+    if os.environ.get(WORKERS_ENV):
+        workers, workers_source = int(os.environ[WORKERS_ENV]), WORKERS_ENV
+
+    return {
+        "workers": workers,
+        "workers_source": workers_source,
+        "cpus": cpus,
+        "cpu_source": cpu_source,
+        "memory_mb": memory_mb,
+        "memory_source": memory_source,
+        "worker_memory_mb": worker_memory_mb
+    }
+
+
+def describe_resources(resources):
+    memory = (f"{resources['memory_mb']} MB ({resources['memory_source']})"
+              if resources["memory_mb"] is not None else "no limit")
+    return (f"Resources: {resources['workers']} worker(s) ({resources['workers_source']}), "
+            f"{resources['cpus']} CPU(s) ({resources['cpu_source']}), memory budget {memory}, "
+            f"{resources['worker_memory_mb']} MB per worker")
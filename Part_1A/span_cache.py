@@ -0,0 +1,194 @@
+import fitz  # PyMuPDF
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from line_table import (EXTRACTOR_VERSION, extract_line_table, extract_matching_pages, iter_page_tables, page_count,
+                        split_table_pages)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Cache location and size can be set per call or through the environment
+CACHE_DIR_ENV = "PDF_SPAN_CACHE_DIR"
+CACHE_MAX_MB_ENV = "PDF_SPAN_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 512
+
+_META_FILE = "meta.json"
+_TEXT_FILE = "text.txt"
+_LOCK_FILE = ".lock"
+
+
+def content_key(pdf_path):
+    # Same bytes + same extractor (and MuPDF) version → same entry
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{digest.hexdigest()}-v{EXTRACTOR_VERSION}-mupdf{fitz.VersionBind}"
+
+
+@contextmanager
+def _cache_lock(cache_dir):
+    # Exclusive lock around writes and eviction; entries are immutable once
+    # published, so readers never need it
+    with open(os.path.join(cache_dir, _LOCK_FILE), "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load_column(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays can't be memory-mapped
+        return np.load(path)
+
+
+def cache_get(cache_dir, key):
+    entry = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(entry, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        lines = _load_column(os.path.join(entry, "lines.npy"))
+        spans = _load_column(os.path.join(entry, "spans.npy"))
+        with open(os.path.join(entry, _TEXT_FILE), encoding="utf-8", newline="") as f:
+            text = f.read()
+        # Touch the entry so eviction sees it as recently used
+        os.utime(os.path.join(entry, _META_FILE))
+    except (OSError, ValueError):
+        # Missing, half-evicted or corrupt entries are just misses
+        return None
+
+    return {"meta": meta, "lines": lines, "spans": spans, "text": text}
+
+
+def _entry_size(entry):
+    return sum(
+        os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)
+    )
+
+
+def _evict(cache_dir, max_bytes, keep):
+    # Drop least recently used entries until the cache fits in max_bytes
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        if name.startswith(".") or not os.path.isdir(entry):
+            continue
+        try:
+            last_used = os.path.getmtime(os.path.join(entry, _META_FILE))
+            entries.append((last_used, _entry_size(entry), name))
+        except OSError:
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+
+
+def cache_put(cache_dir, key, table, max_bytes):
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write into a private temp dir, then publish it with a single rename
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    try:
+        np.save(os.path.join(tmp, "lines.npy"), table["lines"])
+        np.save(os.path.join(tmp, "spans.npy"), table["spans"])
+        with open(os.path.join(tmp, _TEXT_FILE), "w", encoding="utf-8", newline="") as f:
+            f.write(table["text"])
+        with open(os.path.join(tmp, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(table["meta"], f, ensure_ascii=False)
+
+        with _cache_lock(cache_dir):
+            entry = os.path.join(cache_dir, key)
+            if not os.path.exists(entry):
+                os.rename(tmp, entry)
+            _evict(cache_dir, max_bytes, keep=key)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def document_key(pdf_path, cache_dir=None):
+    # The document's cache key, or None when the span cache is disabled.
+    # Hashing reads the whole file, so callers making several cache lookups
+    # for one document compute it once and pass it as `key`.
+    return content_key(pdf_path) if cache_dir or os.environ.get(CACHE_DIR_ENV) else None
+
+
+def load_line_table(pdf_path, cache_dir=None, max_mb=None, page_filter=None, key=None):
+    # Line/span table for pdf_path, served from the span cache when enabled.
+    # page_filter = (keep_text, margin) extracts only matching pages (see
+    # extract_matching_pages) on a cache miss; such partial tables are never
+    # cached, and a cache hit still returns the whole document.
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return extract_matching_pages(pdf_path, *page_filter) if page_filter else extract_line_table(pdf_path)
+
+    key = key or content_key(pdf_path)
+    table = cache_get(cache_dir, key)
+    if table is None and page_filter:
+        return extract_matching_pages(pdf_path, *page_filter)
+    if table is None:
+        table = extract_line_table(pdf_path)
+        store_line_table(pdf_path, table, cache_dir, max_mb, key)
+    return table
+
+
+def store_line_table(pdf_path, table, cache_dir=None, max_mb=None, key=None):
+    # Caches a whole-document table built elsewhere (e.g. from page-range shards)
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return
+    if max_mb is None:
+        max_mb = float(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB))
+    try:
+        cache_put(cache_dir, key or content_key(pdf_path), table, int(max_mb * 1024 * 1024))
+    except OSError as e:
+        print(f"⚠️ Could not cache {os.path.basename(pdf_path)}: {e}")
+
+
+def cached_line_table(pdf_path, cache_dir, key=None):
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    return cache_get(cache_dir, key or content_key(pdf_path)) if cache_dir else None
+
+
+def iter_line_pages(pdf_path, cache_dir=None, pages=None, key=None):
+    # Page-by-page line tables (all pages, or the given page numbers): sliced
+    # from a cached table when there is one, otherwise streamed from MuPDF
+    # without building (or caching) the whole table
+    table = cached_line_table(pdf_path, cache_dir, key)
+    if table is not None:
+        return split_table_pages(table, pages)
+    return iter_page_tables(pdf_path, pages)
+
+
+def cached_page_count(pdf_path, cache_dir=None, key=None):
+    table = cached_line_table(pdf_path, cache_dir, key)
+    if table is not None:
+        return table["meta"]["page_count"]
+    return page_count(pdf_path)
@@ -0,0 +1,28 @@
+import os
+
+from Step1_PDFExtract import build_outline, extract_outline
+from bookmarks import read_bookmarks
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app", "input")
+
+
+def outline_pages(outline):
+    return {h["page"] for section in outline["sections"] for h in section["outline"]}
+
+
+def test_partial_bookmark_tree_is_merged_with_the_scan():
+    # Edit_1's six bookmarks all point at pages 13-16 of 16; trusting them
+    # alone would drop the headings on the guide's earlier pages
+    pdf_path = os.path.join(INPUT_DIR, "Learn Acrobat - Edit_1.pdf")
+    outline = extract_outline(pdf_path)
+
+    assert outline == extract_outline(pdf_path, bookmarks="merge")
+    assert {2, 3, 4, 5, 6, 7, 9, 11} <= outline_pages(outline)
+    texts = [h["text"] for section in outline["sections"] for h in section["outline"]]
+    assert "Edit text in a PDF" in texts and "Format text" in texts
+
+
+def test_covering_bookmark_tree_is_trusted():
+    # Edit_2's bookmarks start on page 1 and run to the last page
+    pdf_path = os.path.join(INPUT_DIR, "Learn Acrobat - Edit_2.pdf")
+    assert extract_outline(pdf_path) == build_outline(read_bookmarks(pdf_path))
@@ -0,0 +1,22 @@
+from cost_model import DEFAULT_MODEL, FEATURES, fit_model, predict_seconds
+
+
+def test_default_model_has_no_negative_coefficients():
+    assert all(DEFAULT_MODEL[name] >= 0 for name in FEATURES)
+
+
+def test_fit_model_keeps_coefficients_non_negative():
+    # Time grows with pages and content, but in these few small records the
+    # larger files happened to run faster: an unconstrained fit gives file
+    # size a negative coefficient
+    rows = [(1, 30.0, 5.0), (2, 10.0, 4.0), (4, 80.0, 3.0), (8, 20.0, 2.0), (16, 60.0, 1.0),
+            (3, 50.0, 4.5), (6, 15.0, 2.5), (12, 90.0, 1.5), (20, 40.0, 0.5)]
+    records = [{"features": {"pages": pages, "content_kb": content_kb, "mb": mb},
+                "actual": 0.02 + 0.01 * pages + 0.0005 * content_kb - 0.003 * mb}
+               for pages, content_kb, mb in rows]
+    model = fit_model(records)
+
+    assert all(model[name] >= 0 for name in FEATURES)
+    small = {"pages": 4, "content_kb": 40.0, "mb": 1.0}
+    large = dict(small, mb=50.0)
+    assert predict_seconds(model, large) >= predict_seconds(model, small)
@@ -0,0 +1,144 @@
+import glob
+import os
+import random
+import re
+from collections import defaultdict
+
+import pytest
+
+from Step1_PDFExtract import add_font_sizes, average_font_size, load_merged_lines
+from heading_rules import PROFILES
+from heading_scoring import detect_headings
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+BUNDLED_PDFS = sorted(
+    glob.glob(os.path.join(ROOT, "Part_1A", "input", "*.pdf")) +
+    glob.glob(os.path.join(ROOT, "app", "input", "*.pdf")) +
+    glob.glob(os.path.join(ROOT, "Part_1B", "data", "input_pdfs", "*.pdf"))
+)
+AVG_SIZES = (8.0, 10.0, 11.5, 14.0)
+
+FALSE_PATTERNS = [
+    'figure', 'table', 'chart', 'image', 'appendix', 'references', 'index',
+    'www.', 'http', 'copyright', 'licensed to', '<null>', 'all rights reserved'
+]
+
+CITATION_PATTERNS = [
+    r'\(\d{4}\)',
+    r'\d{4}[:\-]\s*\d+(-\d+)?',
+    r'\bvol\.?\s*\d+\b',
+    r'\bno\.?\s*\d+\b',
+    r'\bpp?\.?\s*\d+(-\d+)?\b',
+    r'\b[A-Z]\.\s*[A-Z]\.',
+    r'\b\d+\s*\(\d{4}\)',
+    r'“[^”]{5,}”',
+    r'"[^"]{5,}"',
+    r'\b[A-Z][a-z]+,\s*[A-Z]\.([A-Z]\.)?',
+    r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b',
+    r'\b[A-Z][a-z]+\s+[A-Z]\.',
+    r'\bIn\s+Proceedings\b.*?\d{4}',
+    r'\(\d{4}\):\s*\d+(-\d+)?',
+    r'\[\d+\]',
+    r'(?<!\d)\d{4}(?!\d)',
+]
+
+
+def original_is_heading(block, avg_size, profile):
+    # The per-line scorer as it was in Step1_PDFExtract.py (profile "1A") and
+    # Part_1B/pdf_outline_extractor.py (profile "1B") before batch scoring
+    text = block["text"]
+    size = block["size"]
+    score = 0
+
+    if size > avg_size * 1.2:
+        score += 3
+    elif size > avg_size * 1.1:
+        score += 2
+    elif size > avg_size:
+        score += 1
+
+    if profile == "1A" and re.match(r'^\d+(\.\d+)+\s+\w+', text):
+        score -= 5
+    elif profile == "1B" and re.match(r'^\d+(\.\d+)*\s+\w+', text):
+        score += 4
+    elif re.match(r'^Chapter\s+\d+', text, re.IGNORECASE):
+        score += 4
+    elif re.match(r'^[IVXLCDM]+\.\s+', text):
+        score += 3
+
+    if text.isupper() and 3 <= len(text) <= 50:
+        score += 2
+    if len(text.split()) <= 8 and not text.endswith('.'):
+        score += 1
+    if len(text) <= 100:
+        score += 1
+
+    lower = text.lower()
+    if any(word in lower for word in FALSE_PATTERNS):
+        score -= 3
+    if re.match(r'^\d+(\.\d+)*\.?$', text):
+        score -= 5
+    if len(text) > 200:
+        score -= 3
+
+    citation_hits = 0
+    for pattern in CITATION_PATTERNS:
+        if re.search(pattern, text):
+            citation_hits += 1
+    if citation_hits >= 2:
+        score -= 6
+    elif citation_hits == 1 and len(text) > 50:
+        score -= 4
+    digit_words = sum(1 for w in text.split() if w.isdigit())
+    if digit_words >= 2 and digit_words == len(text.split()):
+        return False
+
+    return score >= 4
+
+
+def synthetic_lines(count, seed=0):
+    # Random lines mixing every rule's triggers with plain words and font sizes
+    rng = random.Random(seed)
+    prefixes = ["", "", "", "1 ", "2.3 ", "4.1.2 ", "12. ", "Chapter 3 ", "CHAPTER 10 ", "IV. ", "XII. ",
+                "iv. ", "3.", "7", "0 1", "2 3 4", "A. M. ", "[12] "]
+    words = ["Introduction", "RESULTS", "method", "Table", "figure", "www.example.com", "Overview",
+             "Smith, J.", "(1995)", "vol. 20", "pp. 273-297", "In Proceedings of", "2020", "12345",
+             "“Quoted title here”", '"Quoted title"', "Vladimir Vapnik", "index", "copyright", "data",
+             "analysis", "ETHICAL", "AI", "5", "and", "the", "Summary."]
+    sizes = [7.0, 8.0, 9.0, 9.96, 10.0, 11.0, 12.0, 13.2, 14.0, 16.0, 18.0, 24.0]
+
+    lines = []
+    for _ in range(count):
+        text = rng.choice(prefixes) + " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+        if rng.random() < 0.2:
+            text = text.upper()
+        if rng.random() < 0.05:
+            text = text * rng.randint(3, 10)
+        text = text.strip() or rng.choice(words)
+        lines.append({"text": text, "size": rng.choice(sizes), "flags": 0, "page": 1, "bbox": (0, 0, 1, 1)})
+    return lines
+
+
+def assert_parity(blocks, avg_size, profile):
+    expected = [i for i, block in enumerate(blocks) if original_is_heading(block, avg_size, profile)]
+    detected = {id(block) for block in detect_headings(blocks, avg_size, profile)}
+    assert [i for i, block in enumerate(blocks) if id(block) in detected] == expected
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+@pytest.mark.parametrize("pdf_path", BUNDLED_PDFS, ids=os.path.basename)
+def test_detect_headings_matches_original_on_bundled_pdfs(pdf_path, profile):
+    blocks = load_merged_lines(pdf_path)
+    document_avg = average_font_size(add_font_sizes(defaultdict(int), blocks))
+    for avg_size in (document_avg,) + AVG_SIZES:
+        assert_parity(blocks, avg_size, profile)
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+@pytest.mark.parametrize("avg_size", AVG_SIZES)
+def test_detect_headings_matches_original_on_synthetic_lines(avg_size, profile):
+    assert_parity(synthetic_lines(5000), avg_size, profile)
+
+
+def test_detect_headings_without_lines():
+    assert detect_headings([], 10.0) == []
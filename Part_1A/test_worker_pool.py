@@ -0,0 +1,21 @@
+import glob
+import os
+from functools import partial
+
+from Step1_PDFExtract import extract_outline
+from pdf_batch import iter_outlines
+
+INPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app", "input")
+
+
+def test_recycled_workers_can_shard_documents():
+    # Recycled workers start their own shard pools, so they must not be daemonic
+    pdf_paths = sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf")))[:4]
+    extract = partial(extract_outline, bookmarks="ignore", shard_pages=2, shard_workers=2)
+
+    serial = [(ok, payload) for _, ok, payload, _ in iter_outlines(partial(extract_outline, bookmarks="ignore"),
+                                                                   pdf_paths)]
+    recycled = [(ok, payload) for _, ok, payload, _ in iter_outlines(extract, pdf_paths, 2, max_tasks=3)]
+
+    assert all(ok for ok, _ in recycled), [payload for ok, payload in recycled if not ok]
+    assert recycled == serial
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import wait
+
+from resource_limits import current_rss_mb
+
+# Modules the fork server imports once; every worker is forked from it with
+# them already loaded instead of importing PyMuPDF and compiling rules itself.
+# "__main__" lets workers unpickle functions defined in the running script.
+PRELOAD = ["__main__", "worker_preload"]
+
+OVERHEAD_TASKS = 20  # no-op round trips per worker when measuring task overhead
+
+_measured = False  # the first pool of this process has reported its overhead
+
+
+def _noop(_):
+    return None
+
+
+def pool_context(preload=()):
+    # The forkserver context where the platform has one, else the default.
+    # Preloads only take effect before the process's fork server first starts.
+    # A script read from stdin can't be re-imported by forkserver workers, so
+    # it keeps the default context too.
+    main_file = getattr(sys.modules["__main__"], "__file__", None)
+    if "forkserver" not in multiprocessing.get_all_start_methods() or (main_file and not os.path.exists(main_file)):
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD + list(preload))
+    return context
+
+
+def open_pool(max_workers, initializer=None, initargs=(), preload=()):
+    # A ProcessPoolExecutor whose workers are all started before it is
+    # returned. The first pool of a process prints its warm-up time and the
+    # per-task round trip overhead; later pools (one per sharded document,
+    # say) skip the measurement.
+    global _measured
+    context = pool_context(preload)
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                               initializer=initializer, initargs=initargs)
+    list(pool.map(_noop, range(max_workers)))
+    warm_up = time.perf_counter() - start
+    if _measured:
+        return pool
+    _measured = True
+
+    start = time.perf_counter()
+    list(pool.map(_noop, range(OVERHEAD_TASKS * max_workers)))
+    overhead = (time.perf_counter() - start) / (OVERHEAD_TASKS * max_workers)
+
+    method = context.get_start_method() if context else multiprocessing.get_start_method()
+    print(f"Worker pool: {max_workers} {method} worker(s) ready in {warm_up:.2f}s, "
+          f"{overhead * 1000:.2f} ms overhead per task")
+    return pool
+
+
+def _recycling_worker(conn, fn, max_tasks, max_rss_mb):
+    # Runs (index, item) tasks from conn and sends back (index, result,
+    # over_ceiling, retiring). Retires after max_tasks tasks, or as soon as
+    # a task leaves its RSS above max_rss_mb.
+    done = 0
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break  # the parent went away
+        if task is None:
+            break
+        index, item = task
+        result = fn(item)
+        done += 1
+        rss = current_rss_mb()
+        over_ceiling = max_rss_mb is not None and rss is not None and rss > max_rss_mb
+        retiring = over_ceiling or (max_tasks is not None and done >= max_tasks)
+        conn.send((index, result, over_ceiling, retiring))
+        if retiring:
+            break
+    conn.close()
+
+
+def iter_recycled(fn, items, workers, order=None, max_tasks=None, max_rss_mb=None):
+    # Like a process pool's map, but every worker is replaced by a fresh one
+    # after max_tasks items or once its RSS passes max_rss_mb (MuPDF's stores
+    # and font caches grow over a long run). An item whose worker went over
+    # the ceiling or died is retried once in a fresh worker. Items are handed
+    # out in `order` (default: as given); yields (index, result, error) as they
+    # finish, with result None and an error message for items that failed twice.
+    context = pool_context() or multiprocessing.get_context()
+    pending = deque(order if order is not None else range(len(items)))
+    retries = deque()
+    retries_seen = set()
+    live = {}  # connection → [process, index of its running item or None, tasks run]
+    recycled = 0
+
+    def start_worker():
+        parent_conn, child_conn = context.Pipe()
+        # Not daemonic: a worker may open a pool of its own (page shards);
+        # retire() stops every worker when the run ends or is abandoned
+        process = context.Process(target=_recycling_worker,
+                                  args=(child_conn, fn, max_tasks, max_rss_mb))
+        process.start()
+        child_conn.close()
+        live[parent_conn] = [process, None, 0]
+
+    def retire(conn, stop=False):
+        process, index, _ = live.pop(conn)
+        if stop:
+            if index is None:
+                conn.send(None)
+            else:
+                process.terminate()
+        conn.close()
+        process.join()
+        return process.exitcode
+
+    def assign(conn, index):
+        state = live[conn]
+        state[1] = index
+        state[2] += 1
+        conn.send((index, items[index]))
+
+    try:
+        while pending or retries or any(state[1] is not None for state in live.values()):
+            idle = [conn for conn, state in live.items() if state[1] is None]
+            if retries and len(live) >= workers and idle and all(live[conn][2] for conn in idle):
+                # Make room for a fresh worker
+                retire(idle.pop(), stop=True)
+            while (pending or retries) and len(live) < workers:
+                start_worker()
+
+            for conn, state in list(live.items()):
+                if state[1] is None and retries and state[2] == 0:
+                    assign(conn, retries.popleft())
+                elif state[1] is None and pending:
+                    assign(conn, pending.popleft())
+
+            for conn in wait([conn for conn, state in live.items() if state[1] is not None]):
+                index = live[conn][1]
+                try:
+                    _, result, over_ceiling, retiring = conn.recv()
+                    error = f"worker RSS went over {max_rss_mb} MB" if over_ceiling else None
+                except EOFError:
+                    result, retiring, error = None, True, "worker exited unexpectedly"
+                live[conn][1] = None
+                if retiring:
+                    exitcode = retire(conn)
+                    recycled += 1
+                    if error and exitcode:
+                        error = f"worker exited with code {exitcode}"
+
+                if error is None:
+                    yield index, result, None
+                elif index not in retries_seen:
+                    retries_seen.add(index)
+                    retries.append(index)
+                else:
+                    yield index, None, f"{error} (also on retry in a fresh worker)"
+    finally:
+        for conn in list(live):
+            retire(conn, stop=True)
+
+    print(f"Worker pool: {recycled} worker(s) recycled, {len(retries_seen)} document(s) retried")
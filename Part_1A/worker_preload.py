@@ -0,0 +1,12 @@
+# Imported once in the fork server of worker_pool: everything a worker would
+# otherwise load or build before its first task
+import fitz  # PyMuPDF
+
+import Step1_PDFExtract  # line tables, span cache, bookmarks, heading scoring
+from heading_rules import PROFILES, compile_profile
+
+for _profile in PROFILES:
+    compile_profile(_profile)
+
+# Opening a document once sets up MuPDF's context and font tables
+fitz.open().close()
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Shared extraction modules live with the Part 1A extractor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Part_1A"))
+
+from resource_limits import describe_resources, detect_resources
+from src.query_batch import load_queries, prepare_corpus, run_batch
+from src.subsection_analyser import LOOKAHEAD_PAGES, MAX_CHARS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many persona/job queries against one parsed collection")
+    parser.add_argument("queries",
+                        help='JSON list of {"name", "persona": file, "job": file or "job_text": text}')
+    parser.add_argument("--folder", default="data/input_pdfs",
+                        help="folder of PDFs shared by every query")
+    parser.add_argument("--out-dir", default="outputs/batch",
+                        help="one <name>.json per query is written here")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse extracted spans across runs from this directory")
+    parser.add_argument("--lookahead-pages", type=int, default=LOOKAHEAD_PAGES,
+                        help="how many pages past its heading a subsection may continue")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS,
+                        help="cap on refined text per subsection (0 = no cap)")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="only analyse (and output) the K best-ranked sections of each query")
+    parser.add_argument("--all-sections", action="store_true",
+                        help="with --top-k, still list every candidate section in extracted_sections")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, one query per task (0 = detect from CPU/memory limits)")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        print(describe_resources(detect_resources()))
+
+    queries = load_queries(args.queries)
+
+    start = time.time()
+    corpus = prepare_corpus(args.folder, args.cache_dir)
+    print(f"Parsed {len(corpus['documents'])} documents, {len(corpus['sections'])} sections "
+          f"({time.time() - start:.2f}s)")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    start = time.time()
+    options = {
+        "top_k": args.top_k,
+        "all_sections": args.all_sections,
+        "lookahead_pages": args.lookahead_pages,
+        "max_chars": args.max_chars
+    }
+    for name, output in run_batch(corpus, queries, args.workers, **options):
+        with open(os.path.join(args.out_dir, f"{name}.json"), "w") as f:
+            json.dump(output, f, indent=2)
+
+    elapsed = time.time() - start
+    print(f"✅ {len(queries)} queries written to {args.out_dir} "
+          f"({elapsed:.2f}s, {elapsed / max(len(queries), 1) * 1000:.0f} ms per query)")
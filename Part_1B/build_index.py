@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+import time
+
+# Shared extraction modules live with the Part 1A extractor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Part_1A"))
+
+from src.section_store import open_store, update_store
+from src.subsection_analyser import LOOKAHEAD_PAGES, MAX_CHARS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the persistent section index")
+    parser.add_argument("--db", default="outputs/sections.db",
+                        help="SQLite index file")
+    parser.add_argument("--folder", default="data/input_pdfs",
+                        help="folder of PDFs to index")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse extracted spans across runs from this directory")
+    parser.add_argument("--lookahead-pages", type=int, default=LOOKAHEAD_PAGES,
+                        help="how many pages past its heading a subsection may continue")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS,
+                        help="cap on refined text per subsection (0 = no cap)")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+    start = time.time()
+    conn = open_store(args.db)
+    try:
+        added, updated, removed = update_store(conn, args.folder, args.cache_dir,
+                                               args.lookahead_pages, args.max_chars)
+    finally:
+        conn.close()
+
+    print(f"✅ Index {args.db}: {added} added, {updated} updated, {removed} removed "
+          f"({time.time() - start:.2f}s)")
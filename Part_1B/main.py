@@ -1,41 +1,136 @@
+import argparse
+import json
+import os
+import sys
+
+# Shared extraction modules live with the Part 1A extractor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "Part_1A"))
+
+from resource_limits import describe_resources, detect_resources
+from src.document_model import load_documents
+from src.document_ranking import rank_documents, select_documents
 from src.metadata_extractor import extract_pdf_metadata, get_processing_timestamp
+from src.page_pruning import keyword_page_filter, report_pruning
 from src.persona_parser import parse_persona
-from src.section_extractor import extract_relevant_sections
+from src.relevance_index import query_terms
+from src.section_extractor import extract_relevant_sections, output_sections, top_sections
+from src.section_store import open_store, query_store, stored_documents, stored_subsections, update_store
 from src.job_parser import parse_job
-from src.subsection_analyser import extract_subsections
-import json
-import os
+from src.subsection_analyser import LOOKAHEAD_PAGES, MAX_CHARS, extract_subsections
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Persona-driven section extraction")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse extracted spans across runs from this directory")
+    parser.add_argument("--lookahead-pages", type=int, default=LOOKAHEAD_PAGES,
+                        help="how many pages past its heading a subsection may continue")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS,
+                        help="cap on refined text per subsection (0 = no cap)")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="only analyse (and output) the K best-ranked sections")
+    parser.add_argument("--all-sections", action="store_true",
+                        help="with --top-k, still list every candidate section in extracted_sections")
+    parser.add_argument("--prune-pages", action="store_true",
+                        help="only parse pages whose text contains a job keyword or focus area term")
+    parser.add_argument("--prune-margin", type=int, default=None,
+                        help="with --prune-pages, also parse this many pages around each hit (default: --lookahead-pages)")
+    parser.add_argument("--top-docs", type=int, default=None,
+                        help="only extract sections from the N documents that best match the query")
+    parser.add_argument("--min-doc-score", type=float, default=None,
+                        help="only extract sections from documents scoring at least this much")
+    parser.add_argument("--index-db", default=None,
+                        help="answer from (and incrementally update) this SQLite section index; see build_index.py")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for sub-section analysis, one document per task (0 = detect from CPU/memory limits)")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        print(describe_resources(detect_resources()))
+
+    folder = "data/input_pdfs"
+    persona_path = "data/sample_persona.json"
+    job_path = "data/job_to_be_done.txt"
+
+    persona = parse_persona(persona_path)
+    job = parse_job(job_path)
+
+    weights = query_terms(persona, job)
+
+    if args.index_db:
+        # Sections come from the persistent index; only new or changed PDFs are parsed
+        conn = open_store(args.index_db)
+        try:
+            update_store(conn, folder, args.cache_dir, args.lookahead_pages, args.max_chars)
+            candidates = query_store(conn, weights)
+            selected = candidates if args.top_k is None else top_sections(candidates, args.top_k)
+            output = {
+                "metadata": {
+                    "input_documents": stored_documents(conn),
+                    "persona": persona,
+                    "job_to_be_done": job,
+                    "timestamp": get_processing_timestamp()
+                },
+                "extracted_sections": output_sections(candidates if args.all_sections else selected),
+                "sub_section_analysis": stored_subsections(conn, selected)
+            }
+        finally:
+            conn.close()
+    else:
+        # Optionally rank documents first from their title, bookmarks and first
+        # page, and only go on with the best ones
+        kept = skipped = None
+        if args.top_docs is not None or args.min_doc_score is not None:
+            kept, skipped = select_documents(rank_documents(folder, weights), args.top_docs, args.min_doc_score)
+            print(f"Document ranking: kept {len(kept)} of {len(kept) + len(skipped)} documents")
+
+        # Parse every PDF once; all stages below read from these models. With
+        # --prune-pages only pages holding a query term (plus a margin) are parsed.
+        page_filter = None
+        if args.prune_pages:
+            margin = args.prune_margin if args.prune_margin is not None else args.lookahead_pages
+            page_filter = keyword_page_filter(weights, margin)
+        filenames = {doc["filename"] for doc in kept} if kept is not None else None
+        documents = load_documents(folder, args.cache_dir, page_filter, filenames)
+        if page_filter:
+            report_pruning(documents)
+
+        # Step 1: Extract metadata
+        output = {
+            "metadata": {
+                "input_documents": extract_pdf_metadata(folder, documents),
+                "persona": persona,
+                "job_to_be_done": job,
+                "timestamp": get_processing_timestamp()
+            }
+        }
+        if skipped is not None:
+            output["metadata"]["skipped_documents"] = skipped
+
+        # Step 2: Extract relevant sections
+        candidates = extract_relevant_sections(
+            folder_path=folder,
+            persona=output["metadata"]["persona"],
+            job=output["metadata"]["job_to_be_done"],
+            documents=documents
+        )
+
+        # Sub-section text is only built for the sections that are kept
+        selected = candidates if args.top_k is None else top_sections(candidates, args.top_k)
+        output["extracted_sections"] = output_sections(candidates if args.all_sections else selected)
+
+        # Step 3: Extract sub-section analysis
+        output["sub_section_analysis"] = extract_subsections(
+            folder_path=folder,
+            extracted_sections=selected,
+            documents=documents,
+            lookahead_pages=args.lookahead_pages,
+            max_chars=args.max_chars,
+            workers=args.workers
+        )
+
+    # Ensure output folder exists
+    os.makedirs("outputs", exist_ok=True)
 
-folder = "data/input_pdfs"
-persona_path = "data/sample_persona.json"
-job_path = "data/job_to_be_done.txt"
-
-# Step 1: Extract metadata
-output = {
-    "metadata": {
-        "input_documents": extract_pdf_metadata(folder),
-        "persona": parse_persona(persona_path),
-        "job_to_be_done": parse_job(job_path),
-        "timestamp": get_processing_timestamp()
-    }
-}
-
-# Step 2: Extract relevant sections
-output["extracted_sections"] = extract_relevant_sections(
-    folder_path=folder,
-    persona=output["metadata"]["persona"],
-    job=output["metadata"]["job_to_be_done"]
-)
-
-# Step 3: Extract sub-section analysis
-output["sub_section_analysis"] = extract_subsections(
-    folder_path=folder,
-    extracted_sections=output["extracted_sections"]
-)
-
-# Ensure output folder exists
-os.makedirs("outputs", exist_ok=True)
-
-# Save to outputs/output.json
-with open("outputs/output.json", "w") as f:
-    json.dump(output, f, indent=2)
+    # Save to outputs/output.json
+    with open("outputs/output.json", "w") as f:
+        json.dump(output, f, indent=2)
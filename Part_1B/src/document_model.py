@@ -0,0 +1,63 @@
+import os
+from collections import namedtuple
+
+from span_cache import load_line_table
+
+# One row per span, in reading order. `line` indexes the page's line table.
+Span = namedtuple("Span", ["text", "size", "flags", "bbox", "line"])
+
+
+def document_from_table(filename, table):
+    # Regroup the flat line/span columns into per-page span tables
+    text = table["text"]
+    pages = [{"spans": [], "lines": []} for _ in range(table["meta"]["page_count"])]
+
+    line_rows = table["lines"].tolist()
+    line_pages = []
+    line_numbers = []  # line index within its page
+    for page, _, _, _, x0, y0, x1, y1, _, _ in line_rows:
+        lines = pages[page - 1]["lines"]
+        line_pages.append(page - 1)
+        line_numbers.append(len(lines))
+        lines.append((x0, y0, x1, y1))
+
+    for line, size, flags, x0, y0, x1, y1, start, end in table["spans"].tolist():
+        pages[line_pages[line]]["spans"].append(
+            Span(text[start:end], size, flags, (x0, y0, x1, y1), line_numbers[line])
+        )
+
+    return {
+        "filename": filename,
+        "title": table["meta"]["title"].strip(),
+        "page_count": table["meta"]["page_count"],
+        # Fewer than page_count when pages were pruned; the rest are left empty
+        "parsed_pages": table["meta"].get("parsed_pages", table["meta"]["page_count"]),
+        "hit_pages": table["meta"].get("hit_pages"),
+        "pages": pages
+    }
+
+
+def parse_document(file_path, cache_dir=None, page_filter=None):
+    # Parse every page once (or load from the span cache); no fitz handle is kept.
+    # page_filter: see load_line_table
+    table = load_line_table(file_path, cache_dir, page_filter=page_filter)
+    return document_from_table(os.path.basename(file_path), table)
+
+
+def load_documents(folder_path, cache_dir=None, page_filter=None, filenames=None):
+    # filename → parsed document, in os.listdir order (only `filenames`, if given)
+    if not os.path.exists(folder_path):
+        raise FileNotFoundError(f"Input folder not found: {folder_path}")
+
+    documents = {}
+    for filename in os.listdir(folder_path):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        if filenames is not None and filename not in filenames:
+            continue
+        try:
+            documents[filename] = parse_document(os.path.join(folder_path, filename), cache_dir, page_filter)
+        except Exception as e:
+            print(f"⚠️ Error reading {filename}: {e}")
+
+    return documents
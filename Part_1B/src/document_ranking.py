@@ -0,0 +1,63 @@
+import os
+
+from bookmarks import read_bookmarks
+from line_table import extract_line_table
+
+from src.document_model import document_from_table
+from src.metadata_extractor import extract_pdf_metadata
+from src.relevance_index import bm25_scores, build_index, phrase_automaton
+
+
+def document_profile(file_path):
+    # Cheap stand-in for a document: its title (as extract_pdf_metadata
+    # reports it), bookmark titles and first-page text. Only page 1 is parsed.
+    filename = os.path.basename(file_path)
+    first_page = document_from_table(filename, extract_line_table(file_path, pages=[1]))
+    metadata = extract_pdf_metadata(None, {filename: first_page})
+    bookmarks = read_bookmarks(file_path) or []
+
+    text = [span.text for page in first_page["pages"] for span in page["spans"]]
+    text += [bookmark["text"] for bookmark in bookmarks]
+    return {
+        "filename": filename,
+        "title": metadata[0]["title"] if metadata else "",
+        "text": " ".join(text)
+    }
+
+
+def rank_documents(folder_path, weights):
+    # Every PDF in the folder with its BM25 score against the query, best
+    # first (ties keep os.listdir order)
+    profiles = []
+    for filename in os.listdir(folder_path):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        try:
+            profiles.append(document_profile(os.path.join(folder_path, filename)))
+        except Exception as e:
+            print(f"⚠️ Error reading {filename}: {e}")
+
+    entries = [(profile["title"], profile["text"]) for profile in profiles]
+    scores = bm25_scores(build_index(entries, phrase_automaton(weights)), weights)
+
+    ranked = []
+    for doc_id, profile in enumerate(profiles):
+        ranked.append({
+            "filename": profile["filename"],
+            "title": profile["title"],
+            "score": round(scores.get(doc_id, 0.0), 4)
+        })
+    ranked.sort(key=lambda doc: -doc["score"])
+    return ranked
+
+
+def select_documents(ranked, top_n=None, min_score=None):
+    # (kept, skipped): the top_n best documents and/or those scoring at least min_score
+    kept = []
+    skipped = []
+    for doc in ranked:
+        if (top_n is not None and len(kept) >= top_n) or (min_score is not None and doc["score"] < min_score):
+            skipped.append(doc)
+        else:
+            kept.append(doc)
+    return kept, skipped
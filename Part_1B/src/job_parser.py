@@ -1,7 +1,9 @@
 def parse_job(path):
     with open(path, 'r', encoding='utf-8') as f:
-        job_text = f.read().strip()
+        return job_from_text(f.read())
 
+def job_from_text(text):
+    job_text = text.strip()
     keywords = extract_keywords(job_text)
 
     return {
@@ -0,0 +1,80 @@
+import unicodedata
+from collections import Counter, deque
+
+
+def normalize_text(text):
+    # NFKC (ligatures such as "ﬁ" become "fi"), case-folded, whitespace collapsed
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordAutomaton:
+    # Aho–Corasick automaton over a keyword set: one scan of a line reports
+    # every keyword occurrence, however many keywords there are
+
+    def __init__(self, keywords, word_boundary=True, normalize=True):
+        self.word_boundary = word_boundary
+        self.normalize = normalize_text if normalize else str
+        self.keywords = []
+
+        # Trie: goto[state] maps a character to the next state
+        self._goto = [{}]
+        self._out = [[]]  # keyword ids ending in each state
+        for keyword in keywords:
+            key = self.normalize(keyword)
+            if not key or key in self.keywords:
+                continue
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(self.keywords))
+            self.keywords.append(key)
+
+        # Failure links, breadth first; outputs are inherited along them
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_hits(self, text):
+        # (start, keyword) for every occurrence in the normalized text
+        text = self.normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, ch in enumerate(text, start=1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword_id in out[state]:
+                keyword = self.keywords[keyword_id]
+                start = end - len(keyword)
+                if self.word_boundary and (
+                    (start > 0 and _is_word_char(text[start - 1])) or
+                    (end < len(text) and _is_word_char(text[end]))
+                ):
+                    continue
+                yield start, keyword
+
+    def matches(self, text):
+        # True as soon as any keyword occurs in text
+        return next(self.iter_hits(text), None) is not None
+
+    def count(self, text):
+        # keyword → number of hits in text
+        return Counter(keyword for _, keyword in self.iter_hits(text))
@@ -0,0 +1,32 @@
+from src.keyword_automaton import KeywordAutomaton
+from src.relevance_index import tokenize
+
+
+def keyword_page_filter(weights, margin):
+    # page_filter for load_documents: a page gets the full span parse only if
+    # its plain text holds a query term (or it lies within `margin` pages of
+    # one, so subsections can still follow page breaks). Pages without a hit
+    # can't hold a section that scores, so rankings are unaffected.
+    automaton = KeywordAutomaton(weights)
+
+    def keep_text(text):
+        # Matched on the index's own terms, so a page is kept whenever one of
+        # its sections could score
+        return automaton.matches(" ".join(tokenize(text)))
+
+    return keep_text, margin
+
+
+def report_pruning(documents):
+    # Per-document page skip statistics
+    total = parsed = 0
+    for filename, model in documents.items():
+        skipped = model["page_count"] - model["parsed_pages"]
+        total += model["page_count"]
+        parsed += model["parsed_pages"]
+        if model["hit_pages"] is None:
+            print(f"📄 {filename}: all {model['page_count']} pages loaded from the span cache")
+        else:
+            print(f"📄 {filename}: parsed {model['parsed_pages']}/{model['page_count']} pages "
+                  f"({model['hit_pages']} with keyword hits, {skipped} skipped)")
+    print(f"Page pruning: parsed {parsed} of {total} pages, skipped {total - parsed}")
@@ -0,0 +1,115 @@
+import json
+import os
+
+from pdf_batch import resolve_workers
+from worker_pool import open_pool
+from src.document_model import load_documents
+from src.job_parser import job_from_text, parse_job
+from src.metadata_extractor import extract_pdf_metadata, get_processing_timestamp
+from src.persona_parser import parse_persona
+from src.relevance_index import add_phrases, bm25_scores, build_index, phrase_automaton, query_terms
+from src.section_extractor import find_sections, output_sections, rank_sections, top_sections
+from src.subsection_analyser import LOOKAHEAD_PAGES, MAX_CHARS, analyse_document
+
+_corpus = None  # the shared corpus, in each worker process
+
+
+def load_queries(manifest_path):
+    # The manifest is a JSON list of {"name", "persona", "job"} (or "job_text"
+    # instead of a job file); paths are relative to the manifest
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    queries = []
+    for i, entry in enumerate(entries):
+        if "job_text" in entry:
+            job = job_from_text(entry["job_text"])
+        else:
+            job = parse_job(os.path.join(base, entry["job"]))
+        queries.append({
+            "name": entry.get("name", f"query_{i + 1}"),
+            "persona": parse_persona(os.path.join(base, entry["persona"])),
+            "job": job
+        })
+    return queries
+
+
+def prepare_corpus(folder_path, cache_dir=None):
+    # Everything that doesn't depend on the query: parsed documents, their
+    # metadata, candidate sections and the word index over them
+    documents = load_documents(folder_path, cache_dir)
+    sections, entries = find_sections(documents)
+    return {
+        "documents": documents,
+        "input_documents": extract_pdf_metadata(folder_path, documents),
+        "sections": sections,
+        "entries": entries,
+        "index": build_index(entries),
+        "subsections": {}  # (document, page, bbox) → refined subsection, shared by queries
+    }
+
+
+def _subsections(corpus, selected, lookahead_pages, max_chars):
+    # sub_section_analysis for the selected sections; a section already
+    # analysed for an earlier query is not read again
+    cache = corpus["subsections"]
+    missing = {}
+    for section in selected:
+        key = (section["document"], section["page"], section["bbox"])
+        if key not in cache:
+            missing.setdefault(section["document"], []).append((key, section))
+
+    for filename, items in missing.items():
+        results = analyse_document(corpus["documents"][filename], items, lookahead_pages, max_chars)
+        cache.update(results)
+
+    keys = ((section["document"], section["page"], section["bbox"]) for section in selected)
+    return [cache[key] for key in keys if cache.get(key) is not None]
+
+
+def run_query(corpus, persona, job, top_k=None, all_sections=False,
+              lookahead_pages=LOOKAHEAD_PAGES, max_chars=MAX_CHARS):
+    # One output.json document for a persona/job pair against a prepared corpus
+    weights = query_terms(persona, job)
+    phrases = phrase_automaton(weights)
+    index = corpus["index"] if phrases is None else add_phrases(corpus["index"], corpus["entries"], phrases)
+    scores = bm25_scores(index, weights)
+
+    # rank_sections numbers sections in place, so each query ranks copies
+    sections = {section_id: dict(corpus["sections"][section_id]) for section_id in scores}
+    candidates = rank_sections(sections, scores, weights)
+    selected = candidates if top_k is None else top_sections(candidates, top_k)
+
+    return {
+        "metadata": {
+            "input_documents": corpus["input_documents"],
+            "persona": persona,
+            "job_to_be_done": job,
+            "timestamp": get_processing_timestamp()
+        },
+        "extracted_sections": output_sections(candidates if all_sections else selected),
+        "sub_section_analysis": _subsections(corpus, selected, lookahead_pages, max_chars)
+    }
+
+
+def _init_worker(corpus):
+    global _corpus
+    _corpus = corpus
+
+
+def _run_one(query, options):
+    return query["name"], run_query(_corpus, query["persona"], query["job"], **options)
+
+
+def run_batch(corpus, queries, workers=1, **options):
+    # Yields (name, output) per query, in manifest order. With workers > 1 the
+    # corpus is handed to each worker process once and queries are spread over them.
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(queries) <= 1:
+        for query in queries:
+            yield query["name"], run_query(corpus, query["persona"], query["job"], **options)
+        return
+
+    with open_pool(min(workers, len(queries)), _init_worker, (corpus,), preload=["src.query_batch"]) as pool:
+        yield from pool.map(_run_one, queries, [options] * len(queries))
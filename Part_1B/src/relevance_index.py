@@ -0,0 +1,129 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from src.keyword_automaton import KeywordAutomaton, normalize_text
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+HEADING_WEIGHT = 5     # a term in the heading counts this many times
+KEYWORD_WEIGHT = 1.0   # job-to-be-done keywords
+FOCUS_WEIGHT = 2.0     # persona focus areas
+
+STOP_WORDS = {"and", "the", "on", "for", "with", "to", "a", "of", "in"}
+
+
+def tokenize(text):
+    # Normalized word terms without stop words; simple plurals are folded
+    # ("frameworks" → "framework", "policies" → "policy") so job keywords
+    # match singular headings
+    terms = []
+    for word in re.findall(r'\b\w+\b', normalize_text(text)):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def build_index(entries, phrases=None):
+    # Inverted index over (heading, body) pairs, one per section:
+    # term → {section id: weighted term frequency}. Multi-word phrases (a
+    # KeywordAutomaton) are indexed as terms of their own, see add_phrases.
+    postings = defaultdict(dict)
+    lengths = []
+    for section_id, (heading, body) in enumerate(entries):
+        counts = Counter(tokenize(body))
+        for term in tokenize(heading):
+            counts[term] += HEADING_WEIGHT
+        lengths.append(sum(counts.values()))
+
+        for term, count in counts.items():
+            postings[term][section_id] = count
+
+    index = {
+        "postings": dict(postings),
+        "lengths": lengths,
+        "idf": {}  # filled lazily, once per (term, candidate count)
+    }
+    return index if phrases is None else add_phrases(index, entries, phrases)
+
+
+def add_phrases(index, entries, phrases):
+    # A copy of a word index with the automaton's phrases added as terms; the
+    # word postings are shared, so one word index serves any number of queries.
+    # A phrase can only occur where all of its words do, so only those
+    # sections are scanned (one pass over the heading, one over the body).
+    postings = dict(index["postings"])
+    scan = set()
+    for phrase in phrases.keywords:
+        words = [set(postings.get(term, ())) for term in tokenize(phrase)]
+        scan.update(set.intersection(*words) if words else range(len(entries)))
+
+    for section_id in sorted(scan):
+        heading, body = entries[section_id]
+        counts = phrases.count(body)
+        for phrase, hits in phrases.count(heading).items():
+            counts[phrase] += HEADING_WEIGHT * hits
+        for phrase, count in counts.items():
+            postings.setdefault(phrase, {})[section_id] = count
+
+    return {"postings": postings, "lengths": index["lengths"], "idf": {}}
+
+
+def idf(index, term, n):
+    cached = index["idf"].get((term, n))
+    if cached is None:
+        df = len(index["postings"].get(term, ()))
+        cached = index["idf"][(term, n)] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    return cached
+
+
+def query_terms(persona, job):
+    # term → weight from the job keywords and the persona's focus areas.
+    # Multi-word entries ("algorithmic accountability") also count as a phrase.
+    weights = {}
+    queries = [(keyword, KEYWORD_WEIGHT) for keyword in job.get("keywords", [])]
+    queries += [(area, FOCUS_WEIGHT) for area in persona.get("focus_areas", [])]
+    for query, weight in queries:
+        terms = tokenize(query)
+        if len(terms) > 1:
+            terms.append(normalize_text(query))
+        for term in terms:
+            weights[term] = max(weights.get(term, 0.0), weight)
+    return weights
+
+
+def phrase_automaton(weights):
+    # Automaton over the multi-word query terms, or None if there are none
+    phrases = [term for term in weights if " " in term]
+    return KeywordAutomaton(phrases) if phrases else None
+
+
+def bm25_scores(index, weights):
+    # section id → BM25 score; only sections sharing a term with the query appear.
+    # Collection statistics (section count, average length) are taken over
+    # those candidate sections, so sections that can't match never affect the
+    # ranking and may be left out of the index altogether (page pruning).
+    candidates = set()
+    for term in weights:
+        candidates.update(index["postings"].get(term, ()))
+    if not candidates:
+        return {}
+
+    lengths = index["lengths"]
+    n = len(candidates)
+    avg_length = sum(lengths[section_id] for section_id in candidates) / n or 1.0
+
+    scores = defaultdict(float)
+    for term, weight in weights.items():
+        term_idf = idf(index, term, n)
+        for section_id, tf in index["postings"].get(term, {}).items():
+            norm = K1 * (1 - B + B * lengths[section_id] / avg_length)
+            scores[section_id] += weight * term_idf * tf * (K1 + 1) / (tf + norm)
+    return dict(scores)
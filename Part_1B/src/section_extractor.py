@@ -1,62 +1,102 @@
-import fitz  # PyMuPDF
-import os
 import re
 
-def extract_relevant_sections(folder_path, persona, job):
-    keyword_set = {k.lower().strip() for k in job.get("keywords", [])}
-    extracted = []
+from src.document_model import load_documents
+from src.relevance_index import bm25_scores, build_index, phrase_automaton, query_terms, tokenize
+from src.subsection_analyser import section_text
+
+ROMAN_NUMERAL = re.compile(r"^M{0,3}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})\.?$")  # "III", "XII."
 
-    for filename in os.listdir(folder_path):
-        if not filename.lower().endswith(".pdf"):
-            continue
 
-        file_path = os.path.join(folder_path, filename)
-        seen_titles = set()  # To avoid duplicates within a doc
+def find_sections(documents):
+    # Every heading-like line becomes a section: returns the section dicts and,
+    # for each, (heading, body) with the body text below it on its page
+    sections = []
+    entries = []
+    page_cache = {}
 
+    for filename, model in documents.items():
         try:
-            doc = fitz.open(file_path)
+            for page_num, page in enumerate(model["pages"]):
+                for span in page["spans"]:
+                    text = span.text.strip()
 
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                blocks = page.get_text("dict")["blocks"]
+                    if not text or len(text.split()) > 15:
+                        continue  # Skip overly long lines
+                    if not re.search(r"[^\W\d_]{3}", text):
+                        continue  # Skip list markers and numerals ("I", "IV", "2.1")
+                    if ROMAN_NUMERAL.match(text):
+                        continue  # Skip roman numerals ("III", "VII")
 
-                for block in blocks:
-                    for line in block.get("lines", []):
-                        for span in line.get("spans", []):
-                            text = span.get("text", "").strip()
+                    # Heuristic for heading-like lines
+                    is_heading = (
+                        span.size > 12 or
+                        (text == text.upper() and text.lower() != text) or  # true uppercase check
+                        re.match(r"^\d+(\.\d+)*\s", text)  # numbered headings like "1. ", "2.3 "
+                    )
 
-                            if not text or len(text.split()) > 15:
-                                continue  # Skip overly long lines
 
-                            # Heuristic for heading-like lines
-                            is_heading = (
-                                span["size"] > 12 or
-                                (text == text.upper() and text.lower() != text) or  # true uppercase check
-                                re.match(r"^\d+(\.\d+)*\s", text)  # numbered headings like "1. ", "2.3 "
-                            )
+                    if is_heading:
+                        body = section_text(model, page_num + 1, span, page_cache,
+                                            lookahead_pages=0, max_chars=0)
+                        sections.append({
+                            "document": filename,
+                            "page": page_num + 1,
+                            "section_title": text,
+                            "bbox": span.bbox,  # where the subsection analyser starts reading
+                            "importance_rank": 0  # Will assign later
+                        })
+                        entries.append((text, body))
 
+        except Exception as e:
+            print(f"⚠️ Error processing {filename}: {e}")
 
-                            if is_heading:
-                                text_lc = text.lower()
+    return sections, entries
 
-                                if text_lc in seen_titles:
-                                    continue  # avoid duplicate headings
 
-                                if any(k in text_lc for k in keyword_set):
-                                    extracted.append({
-                                        "document": filename,
-                                        "page": page_num + 1,
-                                        "section_title": text,
-                                        "importance_rank": 0  # Will assign later
-                                    })
-                                    seen_titles.add(text_lc)
+def rank_sections(sections, scores, weights):
+    # Best score first (ties keep discovery order). Unscored sections and
+    # sections whose heading shares no query term are dropped: a short table
+    # cell ("IBM", "TABLE 8") must not rank on the text below it alone. A
+    # title repeated within a document keeps its best occurrence.
+    matching = [section_id for section_id in scores
+                if not weights.keys().isdisjoint(tokenize(sections[section_id]["section_title"]))]
+    ranked = sorted(matching, key=lambda section_id: (-scores[section_id], section_id))
 
-            doc.close()
-        except Exception as e:
-            print(f"⚠️ Error processing {filename}: {e}")
+    extracted = []
+    seen_titles = set()  # To avoid duplicates within a doc
+    for section_id in ranked:
+        section = sections[section_id]
+        key = (section["document"], section["section_title"].lower())
+        if key not in seen_titles:
+            seen_titles.add(key)
+            extracted.append(section)
 
-    # Assign importance based on order
     for i, section in enumerate(extracted):
         section["importance_rank"] = i + 1
 
     return extracted
+
+
+def extract_relevant_sections(folder_path, persona, job, documents=None):
+    # Sections ranked by BM25 against the job keywords and the persona's
+    # focus areas; sections sharing no query term are dropped
+    if documents is None:
+        documents = load_documents(folder_path)
+
+    sections, entries = find_sections(documents)
+    weights = query_terms(persona, job)
+    scores = bm25_scores(build_index(entries, phrase_automaton(weights)), weights)
+    return rank_sections(sections, scores, weights)
+
+
+def top_sections(extracted_sections, k):
+    # The k best-ranked sections across all documents (rank_sections already
+    # returns them best first)
+    return extracted_sections[:k]
+
+
+def output_sections(extracted_sections):
+    # extracted_sections as written to output.json; the bbox only locates the
+    # heading for the subsection analyser and is not part of the schema
+    return [{key: value for key, value in section.items() if key != "bbox"}
+            for section in extracted_sections]
@@ -0,0 +1,173 @@
+import json
+import os
+import sqlite3
+from collections import defaultdict
+
+from span_cache import content_key
+
+from src.document_model import parse_document
+from src.metadata_extractor import extract_pdf_metadata
+from src.relevance_index import HEADING_WEIGHT
+from src.section_extractor import find_sections, rank_sections
+from src.subsection_analyser import LOOKAHEAD_PAGES, MAX_CHARS, analyse_document
+
+# Sections of every indexed PDF, searchable through an FTS5 table that mirrors
+# `sections` (kept in sync by triggers). Documents are keyed by content hash,
+# so re-indexing only touches PDFs that were added, changed or removed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    filename TEXT PRIMARY KEY,
+    content_key TEXT NOT NULL,
+    title TEXT,
+    page_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL,
+    page INTEGER,
+    section_title TEXT,
+    x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+    body TEXT,
+    refined_text TEXT
+);
+CREATE INDEX IF NOT EXISTS sections_by_file ON sections(filename);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    section_title, body,
+    content='sections', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, section_title, body) VALUES (new.id, new.section_title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, section_title, body)
+    VALUES ('delete', old.id, old.section_title, old.body);
+END;
+"""
+
+
+def open_store(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _remove_document(conn, filename):
+    conn.execute("DELETE FROM sections WHERE filename = ?", (filename,))
+    conn.execute("DELETE FROM documents WHERE filename = ?", (filename,))
+
+
+def _add_document(conn, file_path, key, cache_dir, lookahead_pages, max_chars):
+    filename = os.path.basename(file_path)
+    model = parse_document(file_path, cache_dir)
+    metadata = extract_pdf_metadata(None, {filename: model})
+
+    sections, entries = find_sections({filename: model})
+    subsections = dict(analyse_document(model, list(enumerate(sections)), lookahead_pages, max_chars))
+
+    conn.execute("INSERT INTO documents VALUES (?, ?, ?, ?)",
+                 (filename, key, metadata[0]["title"], model["page_count"]))
+    conn.executemany(
+        "INSERT INTO sections (filename, page, section_title, x0, y0, x1, y1, body, refined_text) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(filename, section["page"], section["section_title"], *section["bbox"], body,
+          (subsections.get(i) or {}).get("refined_text", ""))
+         for i, (section, (_, body)) in enumerate(zip(sections, entries))]
+    )
+
+
+def update_store(conn, folder_path, cache_dir=None, lookahead_pages=LOOKAHEAD_PAGES, max_chars=MAX_CHARS):
+    # Bring the index in line with the folder; returns (added, updated, removed) counts
+    indexed = dict(conn.execute("SELECT filename, content_key FROM documents"))
+    present = set()
+    added = updated = 0
+
+    for filename in os.listdir(folder_path):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        file_path = os.path.join(folder_path, filename)
+        present.add(filename)
+        try:
+            # Refined text depends on the lookahead settings, so they are part of the key
+            key = f"{content_key(file_path)}-look{lookahead_pages}-max{max_chars}"
+            if indexed.get(filename) == key:
+                continue
+            with conn:
+                if filename in indexed:
+                    _remove_document(conn, filename)
+                    updated += 1
+                else:
+                    added += 1
+                _add_document(conn, file_path, key, cache_dir, lookahead_pages, max_chars)
+        except Exception as e:
+            print(f"⚠️ Error indexing {filename}: {e}")
+
+    removed = set(indexed) - present
+    with conn:
+        for filename in removed:
+            _remove_document(conn, filename)
+
+    return added, updated, len(removed)
+
+
+def _match_expression(term):
+    # One FTS5 phrase; the porter tokenizer stems it like the indexed text
+    return '"' + term.replace('"', '""') + '"'
+
+
+def query_store(conn, weights):
+    # extracted_sections for the query weights: each term is ranked by FTS5's
+    # bm25() (heading column weighted like the in-memory index) and the
+    # weighted scores are summed per section
+    scores = defaultdict(float)
+    for term, weight in weights.items():
+        rows = conn.execute(
+            "SELECT rowid, bm25(sections_fts, ?, 1.0) FROM sections_fts WHERE sections_fts MATCH ?",
+            (float(HEADING_WEIGHT), _match_expression(term))
+        )
+        for section_id, rank in rows:
+            scores[section_id] -= weight * rank  # bm25() is lower-is-better
+
+    sections = {}
+    rows = conn.execute(
+        "SELECT id, filename, page, section_title, x0, y0, x1, y1 FROM sections "
+        "WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(scores)),)
+    )
+    for section_id, filename, page, title, x0, y0, x1, y1 in rows:
+        sections[section_id] = {
+            "document": filename,
+            "page": page,
+            "section_title": title,
+            "bbox": (x0, y0, x1, y1),
+            "importance_rank": 0
+        }
+    return rank_sections(sections, {section_id: scores[section_id] for section_id in sections}, weights)
+
+
+def stored_subsections(conn, extracted_sections):
+    # sub_section_analysis for the given sections, from the refined text stored at indexing time
+    subsections = []
+    for section in extracted_sections:
+        row = conn.execute(
+            "SELECT refined_text FROM sections WHERE filename = ? AND page = ? AND section_title = ? "
+            "AND x0 = ? AND y0 = ? AND x1 = ? AND y1 = ?",
+            (section["document"], section["page"], section["section_title"], *section["bbox"])
+        ).fetchone()
+        subsections.append({
+            "document": section["document"],
+            "section_title": section["section_title"],
+            "refined_text": row[0] if row else "",
+            "page": section["page"]
+        })
+    return subsections
+
+
+def stored_documents(conn):
+    # The input_documents metadata of every indexed PDF
+    return [
+        {"filename": filename, "title": title, "page_count": page_count}
+        for filename, title, page_count in conn.execute(
+            "SELECT filename, title, page_count FROM documents ORDER BY filename"
+        )
+    ]
@@ -1,73 +1,145 @@
-import fitz  # PyMuPDF
-import os
 import re
+from functools import partial
 
-def extract_subsections(folder_path, extracted_sections):
-    subsection_data = []
+from pdf_batch import resolve_workers
+from worker_pool import open_pool
+from src.document_model import load_documents
 
-    for section in extracted_sections:
-        filename = section["document"]
+# How far a subsection may run past its heading
+LOOKAHEAD_PAGES = 2     # pages after the heading's own page
+MAX_CHARS = 3000        # characters of refined text
+
+
+def looks_like_heading(text):
+    # Uppercase or numbered ("2.3 Results") lines
+    return (text == text.upper() and text.lower() != text) or re.match(r"^\d+(\.\d+)*\s", text)
+
+
+def find_heading(page, section):
+    # The heading's own span: by the bbox recorded at section extraction, or
+    # by text for sections that come without one
+    bbox = section.get("bbox")
+    heading_text = section["section_title"].strip().lower()
+    for span in page["spans"]:
+        if bbox is not None:
+            if span.bbox == tuple(bbox):
+                return span
+        elif heading_text in span.text.strip().lower():
+            return span
+    return None
+
+
+def page_view(page_cache, document, page_number):
+    # Non-empty spans of one page with their vertical centres, plus the
+    # heading-like spans (top, size). Built once per page and shared by every
+    # section that reads it.
+    key = (document["filename"], page_number)
+    view = page_cache.get(key)
+    if view is None:
+        spans = []
+        headings = []
+        for span in document["pages"][page_number - 1]["spans"]:
+            text = span.text.strip()
+            if not text:
+                continue
+            spans.append((span, text, (span.bbox[1] + span.bbox[3]) / 2))
+            if looks_like_heading(text):
+                headings.append((span.bbox[1], span.size))
+        view = page_cache[key] = {"spans": spans, "headings": headings}
+    return view
+
+
+def section_text(document, page_number, heading, page_cache,
+                 lookahead_pages=LOOKAHEAD_PAGES, max_chars=MAX_CHARS):
+    # Clip bands from the heading down to the next heading of equal or higher
+    # rank (at least the heading's size), following page breaks for up to
+    # lookahead_pages pages and max_chars characters
+    parts = []
+    length = 0
+    top = (heading.bbox[1] + heading.bbox[3]) / 2  # includes the rest of the heading's line
+    after = heading.bbox[3]
+    last_page = min(page_number + lookahead_pages, document["page_count"])
+
+    for number in range(page_number, last_page + 1):
+        view = page_view(page_cache, document, number)
+        bottom = min(
+            (y0 for y0, size in view["headings"] if y0 >= after and size >= heading.size),
+            default=float("inf")
+        )
+        for span, text, centre in view["spans"]:
+            if span is not heading and top <= centre < bottom:
+                parts.append(text)
+                length += len(text) + 1
+                if max_chars and length > max_chars:
+                    return " ".join(parts)[:max_chars]
+
+        if bottom != float("inf"):
+            break  # the next heading ends the section
+        top = after = float("-inf")  # continuation pages are read from the top
+
+    return " ".join(parts)
+
+
+def analyse_document(document, sections, lookahead_pages=LOOKAHEAD_PAGES, max_chars=MAX_CHARS):
+    # One document's (index, section) pairs, read in page order with a page
+    # cache of its own; returns (index, subsection or None)
+    page_cache = {}
+    results = []
+
+    for index, section in sorted(sections, key=lambda item: (item[1]["page"], item[0])):
+        filename = document["filename"]
         page_number = section["page"]
         heading_text = section["section_title"].strip()
-        file_path = os.path.join(folder_path, filename)
 
         try:
-            doc = fitz.open(file_path)
-            page = doc[page_number - 1]  # 1-indexed
-            blocks = page.get_text("dict")["blocks"]
-
-            heading_found = False
-            collecting = False
-            refined_lines = []
-            heading_size = None
-
-            for block in blocks:
-                for line in block.get("lines", []):
-                    for span in line.get("spans", []):
-                        text = span.get("text", "").strip()
-                        if not text:
-                            continue
-
-                        # Use substring match to find heading
-                        if not heading_found and heading_text.lower() in text.lower():
-                            heading_found = True
-                            heading_size = span.get("size", 0)
-                            collecting = True
-                            continue
-
-                        if collecting:
-                            # Stop if next heading detected
-                            is_next_heading = (
-                                span.get("size", 0) >= heading_size and
-                                (
-                                    (text == text.upper() and text.lower() != text) or
-                                    re.match(r"^\d+(\.\d+)*\s", text)
-                                )
-                            )
-                            if is_next_heading:
-                                collecting = False
-                                break
-
-                            refined_lines.append(text)
-
-                if not collecting and heading_found:
-                    break
-
-            if not heading_found:
-                print(f"⚠️ Heading not found in {filename} on page {page_number}: '{heading_text}'")
+            page = document["pages"][page_number - 1]  # 1-indexed
 
-            refined_text = " ".join(refined_lines).strip()
+            heading = find_heading(page, section)
+            if heading is None:
+                print(f"⚠️ Heading not found in {filename} on page {page_number}: '{heading_text}'")
+                refined_text = ""
+            else:
+                refined_text = section_text(document, page_number, heading, page_cache,
+                                            lookahead_pages, max_chars).strip()
 
-            subsection_data.append({
+            results.append((index, {
                 "document": filename,
                 "section_title": heading_text,
                 "refined_text": refined_text,
                 "page": page_number
-            })
-
-            doc.close()
+            }))
 
         except Exception as e:
             print(f"⚠️ Error processing section in {filename}: {e}")
+            results.append((index, None))
+
+    return results
+
+
+def extract_subsections(folder_path, extracted_sections, documents=None,
+                        lookahead_pages=LOOKAHEAD_PAGES, max_chars=MAX_CHARS, workers=1):
+    # Sections are grouped by document so each document is walked once, in
+    # page order; with workers > 1 documents are spread over a process pool.
+    # The result keeps the rank order of extracted_sections.
+    if documents is None:
+        documents = load_documents(folder_path)
+
+    groups = {}
+    for index, section in enumerate(extracted_sections):
+        filename = section["document"]
+        if filename not in documents:
+            print(f"⚠️ Error processing section in {filename}: {KeyError(filename)}")
+            continue
+        groups.setdefault(filename, []).append((index, section))
+
+    analyse = partial(analyse_document, lookahead_pages=lookahead_pages, max_chars=max_chars)
+    models = [documents[filename] for filename in groups]
+    workers = resolve_workers(workers)
+    if workers <= 1 or len(groups) <= 1:
+        results = map(analyse, models, groups.values())
+    else:
+        with open_pool(min(workers, len(groups)), preload=["src.subsection_analyser"]) as pool:
+            results = list(pool.map(analyse, models, groups.values()))
 
-    return subsection_data
+    subsections = sorted(item for group in results for item in group if item[1] is not None)
+    return [subsection for _, subsection in subsections]